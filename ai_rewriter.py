@@ -14,6 +14,28 @@ GROQ_API_KEY = os.environ.get('GROQ_API_KEY', '')
 GROQ_MODEL = os.environ.get('GROQ_MODEL', 'llama-3.3-70b-versatile')
 GROQ_API_URL = 'https://api.groq.com/openai/v1/chat/completions'
 
+# One pooled HTTP session for all Groq calls (keeps connections/TLS alive between requests)
+_session: aiohttp.ClientSession | None = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=60)
+        )
+    return _session
+
+
+async def close_session():
+    """Close the shared HTTP session (called on platform shutdown)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
 SYSTEM_PROMPT = """Kau adalah pakar copywriter untuk promosi online di Malaysia.
 Tugas kau: tulis semula teks promosi supaya lebih menarik, kemas, profesional dan engaging.
 
@@ -80,17 +102,17 @@ async def rewrite_promo(original_text: str, company_name: str = '') -> str:
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    logger.error(f"Groq API error {resp.status}: {error_text[:200]}")
-                    return original_text
-
-                data = await resp.json()
-                rewritten = data['choices'][0]['message']['content'].strip()
-                logger.info(f"AI rewrite success: {len(original_text)} -> {len(rewritten)} chars")
-                return rewritten
+        session = await _get_session()
+        async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+            if resp.status != 200:
+                error_text = await resp.text()
+                logger.error(f"Groq API error {resp.status}: {error_text[:200]}")
+                return original_text
+
+            data = await resp.json()
+            rewritten = data['choices'][0]['message']['content'].strip()
+            logger.info(f"AI rewrite success: {len(original_text)} -> {len(rewritten)} chars")
+            return rewritten
 
     except Exception as e:
         logger.error(f"Groq API failed: {e}")
@@ -157,29 +179,29 @@ async def detect_company_ai(message_text: str, company_names: list) -> str | Non
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                if resp.status != 200:
-                    logger.error(f"Groq detect API error {resp.status}")
-                    return None
-
-                data = await resp.json()
-                result = data['choices'][0]['message']['content'].strip()
-                
-                if result.upper() == "NONE" or not result:
-                    _detect_cache[cache_key] = (time.time(), None)
-                    return None
-                
-                # Validate result against actual company names
-                matched = None
-                for name in company_names:
-                    if name.lower() in result.lower():
-                        matched = name
-                        break
-                
-                logger.info(f"AI detect: '{message_text[:60]}...' → {matched or 'NONE'}")
-                _detect_cache[cache_key] = (time.time(), matched)
-                return matched
+        session = await _get_session()
+        async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            if resp.status != 200:
+                logger.error(f"Groq detect API error {resp.status}")
+                return None
+
+            data = await resp.json()
+            result = data['choices'][0]['message']['content'].strip()
+            
+            if result.upper() == "NONE" or not result:
+                _detect_cache[cache_key] = (time.time(), None)
+                return None
+            
+            # Validate result against actual company names
+            matched = None
+            for name in company_names:
+                if name.lower() in result.lower():
+                    matched = name
+                    break
+            
+            logger.info(f"AI detect: '{message_text[:60]}...' → {matched or 'NONE'}")
+            _detect_cache[cache_key] = (time.time(), matched)
+            return matched
 
     except Exception as e:
         logger.error(f"Groq detect failed: {e}")
@@ -225,16 +247,16 @@ async def generate_keywords(company_name: str) -> str:
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                if resp.status != 200:
-                    logger.warning(f"Groq keywords API error {resp.status}")
-                    return _basic_keywords(clean)
+        session = await _get_session()
+        async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            if resp.status != 200:
+                logger.warning(f"Groq keywords API error {resp.status}")
+                return _basic_keywords(clean)
 
-                data = await resp.json()
-                keywords = data['choices'][0]['message']['content'].strip()
-                logger.info(f"AI keywords for '{clean}': {keywords}")
-                return keywords
+            data = await resp.json()
+            keywords = data['choices'][0]['message']['content'].strip()
+            logger.info(f"AI keywords for '{clean}': {keywords}")
+            return keywords
 
     except Exception as e:
         logger.error(f"Groq keywords failed: {e}")
@@ -417,17 +439,17 @@ async def ai_chat(user_message: str, companies: list, chat_history: list = None,
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    logger.error(f"Groq chat API error {resp.status}: {error_text[:200]}")
-                    return None
-
-                data = await resp.json()
-                response = data['choices'][0]['message']['content'].strip()
-                logger.info(f"AI chat response: {len(response)} chars")
-                return response
+        session = await _get_session()
+        async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+            if resp.status != 200:
+                error_text = await resp.text()
+                logger.error(f"Groq chat API error {resp.status}: {error_text[:200]}")
+                return None
+
+            data = await resp.json()
+            response = data['choices'][0]['message']['content'].strip()
+            logger.info(f"AI chat response: {len(response)} chars")
+            return response
 
     except Exception as e:
         logger.error(f"Groq chat failed: {e}")
@@ -490,16 +512,16 @@ async def ai_onboarding(user_name: str, companies: list, custom_prompt: str = No
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                if resp.status != 200:
-                    logger.error(f"Groq onboarding API error {resp.status}")
-                    return None
-
-                data = await resp.json()
-                response = data['choices'][0]['message']['content'].strip()
-                logger.info(f"AI onboarding response: {len(response)} chars")
-                return response
+        session = await _get_session()
+        async with session.post(GROQ_API_URL, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+            if resp.status != 200:
+                logger.error(f"Groq onboarding API error {resp.status}")
+                return None
+
+            data = await resp.json()
+            response = data['choices'][0]['message']['content'].strip()
+            logger.info(f"AI onboarding response: {len(response)} chars")
+            return response
 
     except Exception as e:
         logger.error(f"Groq onboarding failed: {e}")
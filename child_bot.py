@@ -8423,6 +8423,8 @@ class ChildBot:
             if session:
                 new_mode = not session.get('auto_mode', 0)
                 self.db.set_userbot_mode(self.bot_id, new_mode)
+                if self.userbot_manager:
+                    self.userbot_manager.invalidate_cache(self.bot_id, 'session')
             return await self.ub_menu(update, context)
 
         elif data == "ub_grid":
@@ -8473,6 +8475,8 @@ class ChildBot:
             # Remove channel
             ch_id = int(data.replace("ub_rmch_", ""))
             self.db.remove_monitored_channel(ch_id)
+            if self.userbot_manager:
+                self.userbot_manager.reload_filters(self.bot_id)
             return await self._show_channels_menu(update)
 
         elif data == "ub_add_ch":
@@ -9344,6 +9348,7 @@ class ChildBot:
                 channel_title=result['title'],
                 channel_username=result.get('username')
             )
+            self.userbot_manager.reload_filters(self.bot_id)
             if is_bot:
                 success_msg = (
                     f"🤖 Bot **{result['title']}** ditambah!\n"
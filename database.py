@@ -1,19 +1,190 @@
 import sqlite3
+import asyncio
 import datetime
+import queue
+from collections import deque
+from pathlib import Path
 from threading import Lock
 from contextlib import contextmanager
 
 class Database:
-    def __init__(self, db_file):
+    # Per-connection settings (journal_mode=WAL is stored in the file and set once in init_db)
+    _CONNECTION_PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-20000",
+    )
+
+    def __init__(self, db_file, read_pool_size=4):
         self.db_file = db_file
         self.lock = Lock()
+        # Connection pool: one persistent writer + up to N read-only connections
+        self._write_lock = Lock()
+        self._writer = None
+        self._readers = queue.Queue(maxsize=read_pool_size)
+        # Async write batching (see submit)
+        self._pending_writes = deque()
+        self._flush_scheduled = False
+        self._flush_task = None  # Strong reference: the loop only keeps weak ones to running tasks
         self.init_db()
 
     def get_connection(self):
         conn = sqlite3.connect(self.db_file, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn)
         return conn
 
+    def _apply_pragmas(self, conn):
+        for pragma in self._CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+    # ==================== CONNECTION POOL ====================
+
+    def _open_reader(self):
+        uri = Path(self.db_file).resolve().as_uri() + "?mode=ro"
+        # Pooled connections live for the process, so their statement cache keeps hot queries prepared
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn)
+        return conn
+
+    def _get_writer(self):
+        # Caller must hold self._write_lock
+        if self._writer is None:
+            self._writer = self.get_connection()
+        return self._writer
+
+    def init_pool(self):
+        """Open the persistent writer and pre-warm the read-only pool"""
+        with self._write_lock:
+            self._get_writer()
+        while not self._readers.full():
+            self._readers.put_nowait(self._open_reader())
+
+    @contextmanager
+    def read_conn(self):
+        """Borrow a pooled read-only connection (returned to the pool on exit)"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._open_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def write_conn(self):
+        """Use the persistent read-write connection inside a transaction (commit on success, rollback on error)"""
+        with self._write_lock:
+            writer = self._get_writer()
+            with writer:
+                yield writer
+
+    # ==================== WRITE BATCHING ====================
+
+    WRITE_BATCH_SIZE = 32
+
+    async def submit(self, sql, params=(), many=False):
+        """Queue a write and wait for it; writes queued in the same loop tick share one transaction.
+
+        Returns the statement's rowcount, or raises the error it failed with.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_writes.append((sql, params, many, future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            # Flush on the next tick so a lone write is not delayed
+            loop.call_soon(self._start_flush, loop)
+        return await future
+
+    def _start_flush(self, loop):
+        self._flush_task = loop.create_task(self._flush_writes())
+        self._flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task):
+        if self._flush_task is task:
+            self._flush_task = None
+        if task.cancelled():
+            if self._flush_scheduled:
+                # Cancelled before its first step, so _flush_writes never cleaned up
+                self._flush_scheduled = False
+                for _, _, _, future in self._pending_writes:
+                    future.cancel()
+                self._pending_writes.clear()
+        elif task.exception():
+            print(f"Error flushing queued writes: {task.exception()}")
+
+    async def _flush_writes(self):
+        batch = []
+        try:
+            while self._pending_writes:
+                batch = [self._pending_writes.popleft()
+                         for _ in range(min(self.WRITE_BATCH_SIZE, len(self._pending_writes)))]
+                try:
+                    results = await asyncio.to_thread(self._execute_batch, [op[:3] for op in batch])
+                except Exception as e:
+                    results = [e] * len(batch)
+                for (_, _, _, future), result in zip(batch, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        except BaseException as e:
+            # Don't leave callers awaiting writes this flush will never finish
+            for _, _, _, future in [*batch, *self._pending_writes]:
+                if future.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+            self._pending_writes.clear()
+            raise
+        finally:
+            self._flush_scheduled = False
+
+    def _execute_batch(self, ops):
+        """Run queued writes inside one BEGIN IMMEDIATE; a failing op is rolled back on its own"""
+        results = []
+        with self._write_lock:
+            conn = self._get_writer()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params, many in ops:
+                    conn.execute("SAVEPOINT op")
+                    try:
+                        cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+                        results.append(cursor.rowcount)
+                    except sqlite3.Error as e:
+                        conn.execute("ROLLBACK TO op")
+                        results.append(e)
+                    conn.execute("RELEASE op")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return results
+
+    def backup_to(self, dest_file):
+        """Copy a consistent snapshot of the database (includes pages still in the WAL)"""
+        src = self.get_connection()
+        dest = sqlite3.connect(dest_file)
+        try:
+            src.backup(dest)
+        finally:
+            dest.close()
+            src.close()
+
     @contextmanager
     def _conn(self):
         """Context manager for safe auto-closing DB connections."""
@@ -39,6 +210,9 @@ class Database:
         with self.lock:
             conn = self.get_connection()
             cursor = conn.cursor()
+
+            # WAL lets the read-only pool run alongside the writer (persists in the DB file)
+            cursor.execute("PRAGMA journal_mode=WAL")
             
             # 1. Bots Table (Child Bots)
             cursor.execute('''
@@ -63,6 +237,15 @@ class Database:
 
                 pass  # Silently handle exception  # Column already exists
             
+            # Migration: Date part of subscription_end, computed by SQLite on read (listings select it directly)
+            try:
+                cursor.execute(
+                    "ALTER TABLE bots ADD COLUMN subscription_end_date TEXT "
+                    "GENERATED ALWAYS AS (substr(subscription_end, 1, 10)) VIRTUAL"
+                )
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+            
             # Migration: Add livegram_enabled column if missing
             try:
                 cursor.execute("ALTER TABLE bots ADD COLUMN livegram_enabled BOOLEAN DEFAULT 1")
@@ -390,12 +573,18 @@ class Database:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_companies_bot_id ON companies(bot_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_bot_id ON users(bot_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_withdrawals_bot_id ON withdrawals(bot_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_withdrawals_status ON withdrawals(status)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_withdrawals_user_id ON withdrawals(user_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_menu_buttons_bot_id ON menu_buttons(bot_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_bot_admins_bot_id ON bot_admins(bot_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_company_buttons_company_id ON company_buttons(company_id)')
+            # Covering indexes for the mother bot management screens
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_bots_owner ON bots(owner_id, id, bot_username, subscription_end, is_active)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_botid_joined ON users(bot_id, joined_at DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_botid_invites ON users(bot_id, total_invites DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_withdrawals_botid_status ON withdrawals(bot_id, status, amount)')
+            # bot_id-only lookups use the composite's prefix; the single-column index is redundant
+            cursor.execute('DROP INDEX IF EXISTS idx_withdrawals_bot_id')
 
             # Migration: Add category column to companies
             try:
@@ -538,6 +727,12 @@ class Database:
                 )
             ''')
 
+            # Migration: Add access_hash to monitored_channels (lets scans skip entity resolution)
+            try:
+                cursor.execute("ALTER TABLE monitored_channels ADD COLUMN access_hash INTEGER")
+            except Exception:
+                pass  # Column already exists
+
             # 15. Detected Promos Table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS detected_promos (
@@ -568,27 +763,37 @@ class Database:
                 )
             ''')
 
+            # 17. Platform Bans Table (/ban from mother bot, kept even for IDs with no users row)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS platform_bans (
+                    telegram_id INTEGER PRIMARY KEY,
+                    banned_by INTEGER NOT NULL,
+                    banned_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Gather planner statistics once so the composite indexes get picked
+            if not cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+                cursor.execute("ANALYZE")
+
             conn.commit()
             conn.close()
 
     # --- Bot Management ---
     def create_bot(self, token, owner_id, username, trial_days=3):
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                expiry = datetime.datetime.now() + datetime.timedelta(days=trial_days)
-                conn.execute(
-                    "INSERT INTO bots (token, owner_id, bot_username, subscription_end) VALUES (?, ?, ?, ?)",
+        """Register a bot; returns (success, message, new bot row or None)"""
+        expiry = datetime.datetime.now() + datetime.timedelta(days=trial_days)
+        try:
+            with self.write_conn() as conn:
+                bot = conn.execute(
+                    "INSERT INTO bots (token, owner_id, bot_username, subscription_end) VALUES (?, ?, ?, ?) RETURNING *",
                     (token, owner_id, username, expiry)
-                )
-                conn.commit()
-                return True, "Bot registered successfully."
-            except sqlite3.IntegrityError:
-                return False, "Bot token already registered."
-            except Exception as e:
-                return False, str(e)
-            finally:
-                conn.close()
+                ).fetchone()
+            return True, "Bot registered successfully.", dict(bot)
+        except sqlite3.IntegrityError:
+            return False, "Bot token already registered.", None
+        except Exception as e:
+            return False, str(e), None
 
     def get_all_bots(self):
         conn = self.get_connection()
@@ -597,18 +802,83 @@ class Database:
         return [dict(bot) for bot in bots]
 
     def get_bot_by_token(self, token):
-        conn = self.get_connection()
-        bot = conn.execute("SELECT * FROM bots WHERE token = ?", (token,)).fetchone()
-        conn.close()
+        with self.read_conn() as conn:
+            bot = conn.execute("SELECT * FROM bots WHERE token = ?", (token,)).fetchone()
         return dict(bot) if bot else None
     
     def get_bot_by_id(self, bot_id):
         """Get bot details by bot ID"""
-        conn = self.get_connection()
-        bot = conn.execute("SELECT * FROM bots WHERE id = ?", (bot_id,)).fetchone()
-        conn.close()
+        with self.read_conn() as conn:
+            bot = conn.execute(self._SQL_BOT_BY_ID, (bot_id,)).fetchone()
         return dict(bot) if bot else None
 
+    # Tables holding rows that belong to a single child bot
+    _BOT_CHILD_TABLES = (
+        'companies', 'users', 'withdrawals', 'broadcasts', 'forwarder_config',
+        'bot_known_groups', 'group_welcomes', 'menu_buttons', 'bot_admins',
+        'notify_4d_subscribers', 'ban_words', 'auto_replies', 'userbot_sessions',
+        'monitored_channels', 'detected_promos', 'whatsapp_sessions',
+    )
+
+    def delete_bots(self, bot_ids):
+        """Delete bots and all their child rows in one transaction; returns [{'id', 'token'}] of the bots deleted"""
+        bot_ids = list(bot_ids)
+        if not bot_ids:
+            return []
+        placeholders = ','.join('?' * len(bot_ids))
+        with self.write_conn() as conn:  # single BEGIN/COMMIT for every statement below
+            rows = conn.execute(
+                f"DELETE FROM bots WHERE id IN ({placeholders}) RETURNING id, token", bot_ids
+            ).fetchall()
+            # Only bots that still existed have child rows worth sweeping
+            params = [(row['id'],) for row in rows]
+            conn.executemany(
+                "DELETE FROM company_buttons WHERE company_id IN (SELECT id FROM companies WHERE bot_id = ?)",
+                params
+            )
+            for table in self._BOT_CHILD_TABLES:
+                conn.executemany(f"DELETE FROM {table} WHERE bot_id = ?", params)
+        return [dict(row) for row in rows]
+
+    def delete_bot(self, bot_id):
+        """Delete a single bot and its data; returns {'id', 'token'} of the deleted bot, or None if already gone"""
+        deleted = self.delete_bots([bot_id])
+        return deleted[0] if deleted else None
+
+    def toggle_bot_active(self, bot_id):
+        """Flip a bot's is_active flag; returns the updated bot row, or None if missing"""
+        with self.write_conn() as conn:
+            row = conn.execute(
+                "UPDATE bots SET is_active = 1 - is_active WHERE id = ? RETURNING *", (bot_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def extend_bot_subscription(self, bot_id, days, now):
+        """Add days to a bot's subscription (from now if already expired); returns (bot, new_end) or (None, None)"""
+        with self.write_conn() as conn:
+            row = conn.execute("SELECT * FROM bots WHERE id = ?", (bot_id,)).fetchone()
+            if not row:
+                return None, None
+            try:
+                current_end = datetime.datetime.fromisoformat(row['subscription_end'])
+            except (TypeError, ValueError):
+                current_end = now
+            # If expired, start from now
+            new_end = max(current_end, now) + datetime.timedelta(days=days)
+            conn.execute("UPDATE bots SET subscription_end = ? WHERE id = ?", (new_end.isoformat(), bot_id))
+        return dict(row), new_end
+
+    def get_all_bots_with_user_counts(self):
+        """Get every bot (newest first) with its user count"""
+        with self.read_conn() as conn:
+            rows = conn.execute("""
+                SELECT b.*, 
+                       (SELECT COUNT(*) FROM users WHERE bot_id = b.id) as user_count
+                FROM bots b 
+                ORDER BY b.created_at DESC
+            """).fetchall()
+        return [dict(row) for row in rows]
+
     def extend_subscription(self, owner_id, days):
         with self.lock:
             conn = self.get_connection()
@@ -659,6 +929,16 @@ class Database:
         conn.close()
         return [dict(row) for row in rows]
 
+    def count_companies(self, bot_id):
+        """Count companies for a bot without materializing the rows"""
+        with self.read_conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM companies WHERE bot_id = ?", (bot_id,)).fetchone()[0]
+
+    def count_bot_users(self, bot_id):
+        """Count a bot's users without materializing the rows"""
+        with self.read_conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users WHERE bot_id = ?", (bot_id,)).fetchone()[0]
+
     def get_company(self, bot_id, company_id):
         """Get a single company by ID"""
         conn = self.get_connection()
@@ -681,6 +961,15 @@ class Database:
             conn.close()
             return True
     
+    def edit_companies_bulk(self, field, updates):
+        """Set one field on many companies in a single transaction; updates is [(company_id, value), ...]"""
+        if field not in ('name', 'description', 'button_text', 'button_url', 'emoji', 'keywords'):
+            return False
+        with self.write_conn() as conn:
+            conn.executemany(f"UPDATE companies SET {field} = ? WHERE id = ?",
+                             [(value, company_id) for company_id, value in updates])
+        return True
+    
     def update_cached_file_id(self, company_id, file_id):
         """Cache Telegram file_id for smooth carousel editing"""
         with self.lock:
@@ -1625,30 +1914,24 @@ class Database:
     
     def add_platform_owner(self, telegram_id, added_by):
         """Add a platform owner (for mother bot)"""
-        conn = self.get_connection()
         try:
-            conn.execute(
-                "INSERT INTO platform_owners (telegram_id, added_by) VALUES (?, ?)",
-                (telegram_id, added_by)
-            )
-            conn.commit()
+            with self.write_conn() as conn:
+                conn.execute(
+                    "INSERT INTO platform_owners (telegram_id, added_by) VALUES (?, ?)",
+                    (telegram_id, added_by)
+                )
             return True
         except sqlite3.IntegrityError:
             return False  # Already owner
-        finally:
-            conn.close()
     
     def remove_platform_owner(self, telegram_id):
         """Remove a platform owner"""
-        conn = self.get_connection()
-        result = conn.execute(
-            "DELETE FROM platform_owners WHERE telegram_id = ?",
-            (telegram_id,)
-        )
-        conn.commit()
-        deleted = result.rowcount > 0
-        conn.close()
-        return deleted
+        with self.write_conn() as conn:
+            result = conn.execute(
+                "DELETE FROM platform_owners WHERE telegram_id = ?",
+                (telegram_id,)
+            )
+        return result.rowcount > 0
     
     def get_platform_owners(self):
         """Get all platform owners"""
@@ -1659,6 +1942,32 @@ class Database:
         conn.close()
         return [dict(o) for o in owners]
     
+    def get_platform_owner_ids(self):
+        """Get the set of platform owner Telegram IDs"""
+        conn = self.get_connection()
+        rows = conn.execute("SELECT telegram_id FROM platform_owners").fetchall()
+        conn.close()
+        return {row['telegram_id'] for row in rows}
+
+    def get_blacklisted_user_ids(self):
+        """Get the set of Telegram IDs banned from the platform (/ban)"""
+        with self.read_conn() as conn:
+            rows = conn.execute(
+                "SELECT telegram_id FROM users WHERE is_blacklisted = 1 "
+                "UNION SELECT telegram_id FROM platform_bans"
+            ).fetchall()
+        return {row['telegram_id'] for row in rows}
+
+    def ban_platform_users(self, telegram_ids, banned_by):
+        """Ban Telegram IDs from the platform, whether or not they have joined a bot yet"""
+        params = [(telegram_id,) for telegram_id in telegram_ids]
+        with self.write_conn() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO platform_bans (telegram_id, banned_by) VALUES (?, ?)",
+                [(telegram_id, banned_by) for telegram_id in telegram_ids]
+            )
+            conn.executemany("UPDATE users SET is_blacklisted = 1 WHERE telegram_id = ?", params)
+    
     def is_platform_owner(self, telegram_id, master_admin_id=None):
         """Check if user is platform owner (includes master admin from env)"""
         # Check if master admin from env variable
@@ -1673,6 +1982,109 @@ class Database:
         conn.close()
         return owner is not None
 
+    # ==================== MOTHER BOT DASHBOARD ====================
+    # Fixed SQL text so the pooled connections' statement cache always hits
+
+    _SQL_BOT_BY_ID = "SELECT * FROM bots WHERE id = ?"
+    _SQL_BOT_STATS = """
+        SELECT u.cnt, u.balance, u.invites,
+            (SELECT COUNT(*) FROM companies WHERE bot_id = ?1),
+            (SELECT COUNT(*) FROM withdrawals WHERE bot_id = ?1 AND status = 'PENDING')
+        FROM (
+            SELECT COUNT(*) AS cnt, COALESCE(SUM(balance), 0) AS balance, COALESCE(SUM(total_invites), 0) AS invites
+            FROM users WHERE bot_id = ?1
+        ) u
+    """
+    _SQL_BOT_USERS_PAGE = (
+        "SELECT id, telegram_id, balance, total_invites, joined_at FROM users "
+        "WHERE bot_id = ?1 ORDER BY joined_at DESC, id LIMIT ?2"
+    )
+    # Keyset page: rows after user ?2 in (joined_at DESC, id) order; seeks idx_users_botid_joined
+    _SQL_BOT_USERS_AFTER = """
+        SELECT id, telegram_id, balance, total_invites, joined_at FROM users
+        WHERE bot_id = ?1
+          AND joined_at <= (SELECT joined_at FROM users WHERE id = ?2)
+          AND NOT (joined_at = (SELECT joined_at FROM users WHERE id = ?2) AND id <= ?2)
+        ORDER BY joined_at DESC, id LIMIT ?3
+    """
+    _SQL_USER_GROWTH = """
+        SELECT
+            COALESCE(SUM(balance), 0),
+            COUNT(CASE WHEN DATE(joined_at) = DATE('now') THEN 1 END),
+            COUNT(CASE WHEN DATE(joined_at) >= DATE('now', '-7 days') THEN 1 END)
+        FROM users WHERE bot_id = ?
+    """
+    _SQL_WITHDRAWAL_TOTALS = (
+        "SELECT status, SUM(amount) FROM withdrawals "
+        "WHERE bot_id = ? AND status IN ('APPROVED', 'PENDING') GROUP BY status"
+    )
+    _SQL_TOP_REFERRERS = (
+        "SELECT telegram_id, total_invites FROM users "
+        "WHERE bot_id = ? ORDER BY total_invites DESC LIMIT ?"
+    )
+
+    # Only the columns the /mybots listing renders; idx_bots_owner covers the owner filter
+    _SQL_MYBOTS = """
+        SELECT b.id, b.owner_id, b.bot_username, b.subscription_end, b.subscription_end_date, b.is_active,
+               (SELECT COUNT(*) FROM users WHERE bot_id = b.id) AS user_count,
+               (SELECT COUNT(*) FROM companies WHERE bot_id = b.id) AS company_count
+        FROM bots b
+    """
+    _SQL_MYBOTS_ALL = _SQL_MYBOTS + "ORDER BY b.id"
+    _SQL_MYBOTS_OWNER = _SQL_MYBOTS + "WHERE b.owner_id = ?"
+
+    def get_bots_overview(self, owner_id=None):
+        """Get bots (all, or one owner's) with their user and company counts"""
+        with self.read_conn() as conn:
+            if owner_id is None:
+                rows = conn.execute(self._SQL_MYBOTS_ALL).fetchall()
+            else:
+                rows = conn.execute(self._SQL_MYBOTS_OWNER, (owner_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_bot_stats(self, bot_id):
+        """Get the bot row plus user/company/withdrawal totals for the stats panel"""
+        with self.read_conn() as conn:
+            conn.execute("BEGIN DEFERRED")
+            bot = conn.execute(self._SQL_BOT_BY_ID, (bot_id,)).fetchone()
+            users, balance, invites, companies, pending = conn.execute(self._SQL_BOT_STATS, (bot_id,)).fetchone()
+            conn.commit()
+        return {
+            'bot': dict(bot) if bot else None,
+            'total_users': users,
+            'total_companies': companies,
+            'total_balance': balance,
+            'total_invites': invites,
+            'pending_withdrawals': pending,
+        }
+
+    def get_bot_users_page(self, bot_id, limit=20, after_id=None):
+        """Get a page of a bot's users, newest first; pass the last row's id as after_id for the next page"""
+        with self.read_conn() as conn:
+            if after_id is None:
+                rows = conn.execute(self._SQL_BOT_USERS_PAGE, (bot_id, limit)).fetchall()
+            else:
+                rows = conn.execute(self._SQL_BOT_USERS_AFTER, (bot_id, after_id, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_bot_panel_analytics(self, bot_id, top_limit=5):
+        """Get balance, withdrawal totals, signup growth and top referrers for the analytics panel"""
+        with self.read_conn() as conn:
+            # One read transaction: all three statements see the same snapshot
+            conn.execute("BEGIN DEFERRED")
+            balance, users_today, users_this_week = conn.execute(self._SQL_USER_GROWTH, (bot_id,)).fetchone()
+            withdrawal_totals = dict(conn.execute(self._SQL_WITHDRAWAL_TOTALS, (bot_id,)).fetchall())
+            top_referrers = conn.execute(self._SQL_TOP_REFERRERS, (bot_id, top_limit)).fetchall()
+            conn.commit()
+        return {
+            'total_balance': balance,
+            'approved_withdrawals': withdrawal_totals.get('APPROVED') or 0,
+            'pending_withdrawals': withdrawal_totals.get('PENDING') or 0,
+            'users_today': users_today,
+            'users_this_week': users_this_week,
+            'top_referrers': [dict(row) for row in top_referrers],
+        }
+
     # ==================== FORWARDER CONFIG ====================
     
     def save_forwarder_config(self, bot_id, source_channel_id, source_channel_name, 
@@ -1837,68 +2249,53 @@ class Database:
     
     def clone_bot_data(self, source_bot_id, target_bot_id):
         """Clone all data from source bot to target bot (companies, buttons, settings)"""
-        conn = self.get_connection()
         try:
-            # Clone companies
-            companies = conn.execute(
-                "SELECT name, description, media_file_id, media_type FROM companies WHERE bot_id = ?",
-                (source_bot_id,)
-            ).fetchall()
-            
-            for c in companies:
-                cursor = conn.execute(
-                    "INSERT INTO companies (bot_id, name, description, media_file_id, media_type) VALUES (?, ?, ?, ?, ?)",
-                    (target_bot_id, c['name'], c['description'], c['media_file_id'], c['media_type'])
+            with self.write_conn() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                
+                # Clone companies (new ids are allocated in source id order)
+                last_id = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM companies WHERE bot_id = ?", (target_bot_id,)
+                ).fetchone()[0]
+                conn.execute(
+                    """INSERT INTO companies (bot_id, name, description, media_file_id, media_type)
+                       SELECT ?, name, description, media_file_id, media_type
+                       FROM companies WHERE bot_id = ? ORDER BY id""",
+                    (target_bot_id, source_bot_id)
                 )
-                new_company_id = cursor.lastrowid
                 
-                # Clone company buttons
-                old_company_id = conn.execute(
-                    "SELECT id FROM companies WHERE bot_id = ? AND name = ?",
-                    (source_bot_id, c['name'])
-                ).fetchone()
+                # Clone company buttons, pairing old and new companies by position
+                conn.execute(
+                    """INSERT INTO company_buttons (company_id, text, url, row_group)
+                       SELECT n.id, b.text, b.url, b.row_group
+                       FROM company_buttons b
+                       JOIN (SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn
+                             FROM companies WHERE bot_id = ?) o ON o.id = b.company_id
+                       JOIN (SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn
+                             FROM companies WHERE bot_id = ? AND id > ?) n ON n.rn = o.rn
+                       ORDER BY n.id, b.id""",
+                    (source_bot_id, target_bot_id, last_id)
+                )
                 
-                if old_company_id:
-                    buttons = conn.execute(
-                        "SELECT text, url, row_group FROM company_buttons WHERE company_id = ?",
-                        (old_company_id['id'],)
-                    ).fetchall()
-                    for btn in buttons:
-                        conn.execute(
-                            "INSERT INTO company_buttons (company_id, text, url, row_group) VALUES (?, ?, ?, ?)",
-                            (new_company_id, btn['text'], btn['url'], btn['row_group'])
-                        )
-            
-            # Clone menu buttons
-            menu_btns = conn.execute(
-                "SELECT text, url, row_group FROM menu_buttons WHERE bot_id = ?",
-                (source_bot_id,)
-            ).fetchall()
-            for btn in menu_btns:
+                # Clone menu buttons
                 conn.execute(
-                    "INSERT INTO menu_buttons (bot_id, text, url, row_group) VALUES (?, ?, ?, ?)",
-                    (target_bot_id, btn['text'], btn['url'], btn['row_group'])
+                    """INSERT INTO menu_buttons (bot_id, text, url, row_group)
+                       SELECT ?, text, url, row_group FROM menu_buttons WHERE bot_id = ? ORDER BY id""",
+                    (target_bot_id, source_bot_id)
                 )
-            
-            # Clone bot settings (welcome, banner, etc.)
-            source_bot = conn.execute("SELECT * FROM bots WHERE id = ?", (source_bot_id,)).fetchone()
-            if source_bot:
+                
+                # Clone bot settings (welcome, banner, etc.)
                 conn.execute(
-                    """UPDATE bots SET 
-                       custom_banner = ?, custom_caption = ?, 
-                       referral_enabled = ?, livegram_enabled = ?
-                       WHERE id = ?""",
-                    (source_bot['custom_banner'], source_bot['custom_caption'],
-                     source_bot['referral_enabled'], source_bot['livegram_enabled'], target_bot_id)
+                    """UPDATE bots SET
+                       (custom_banner, custom_caption, referral_enabled, livegram_enabled) = (
+                           SELECT custom_banner, custom_caption, referral_enabled, livegram_enabled
+                           FROM bots WHERE id = ?1)
+                       WHERE id = ?2 AND EXISTS (SELECT 1 FROM bots WHERE id = ?1)""",
+                    (source_bot_id, target_bot_id)
                 )
-            
-            conn.commit()
             return True
         except Exception as e:
-            conn.rollback()
             return False
-        finally:
-            conn.close()
 
     # ==================== ANALYTICS ====================
     
@@ -2749,24 +3146,28 @@ class Database:
             conn.commit()
             conn.close()
 
+    def set_monitored_channel_access_hash(self, bot_id, channel_id, access_hash):
+        """Store a resolved channel's access hash so it can be used as an InputPeerChannel later"""
+        with self.write_conn() as conn:
+            conn.execute(
+                "UPDATE monitored_channels SET access_hash = ? WHERE bot_id = ? AND channel_id = ?",
+                (access_hash, bot_id, str(channel_id))
+            )
+
     # === DETECTED PROMOS METHODS ===
 
     def save_detected_promo(self, bot_id, source_channel, original_text, swapped_text, media_file_ids, media_types, matched_company):
         """Save a detected promo"""
         import json
-        with self.lock:
-            conn = self.get_connection()
-            conn.execute("""
+        with self.write_conn() as conn:
+            return conn.execute("""
                 INSERT INTO detected_promos (bot_id, source_channel, original_text, swapped_text, media_file_ids, media_types, matched_company)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
             """, (bot_id, source_channel, original_text, swapped_text,
                   json.dumps(media_file_ids) if media_file_ids else None,
                   json.dumps(media_types) if media_types else None,
-                  matched_company))
-            conn.commit()
-            promo_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-            conn.close()
-            return promo_id
+                  matched_company)).fetchone()[0]
 
     def get_pending_promos(self, bot_id):
         """Get pending promos for a bot"""
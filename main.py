@@ -99,7 +99,6 @@ class BotManager:
 
     async def backup_database(self):
         """Create backup of database file"""
-        import shutil
         import os
         from datetime import datetime
         
@@ -111,7 +110,7 @@ class BotManager:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_file = f"{backup_dir}/bot_platform_{timestamp}.db"
             
-            shutil.copy2(DB_FILE, backup_file)
+            self.db.backup_to(backup_file)
             logger.info(f"💾 Database backup created: {backup_file}")
             
             # Keep only last 7 backups
@@ -336,15 +335,16 @@ class BotManager:
         except Exception as e:
             logger.error(f"❌ Error processing update: {e}", exc_info=True)
 
-    async def stop_bot(self, bot_id):
-        """Stop a running child bot by ID"""
-        # Find bot by ID
-        bot_data = self.db.get_bot_by_id(bot_id)
-        if not bot_data:
-            logger.warning(f"⚠️ Bot {bot_id} not found in database")
-            return
+    async def stop_bot(self, bot_id, token=None):
+        """Stop a running child bot by ID (pass token when the row is already gone)"""
+        if token is None:
+            # Find bot by ID
+            bot_data = self.db.get_bot_by_id(bot_id)
+            if not bot_data:
+                logger.warning(f"⚠️ Bot {bot_id} not found in database")
+                return
+            token = bot_data['token']
         
-        token = bot_data['token']
         if token in self.bots:
             try:
                 child = self.bots[token]
@@ -360,6 +360,10 @@ class BotManager:
         logger.info("🔻 Shutting down platform...")
         await self.userbot_manager.stop_all()
         self.scheduler.shutdown()
+        from ai_rewriter import close_session
+        await close_session()
+        from utils_4d import close_browser
+        await close_browser()
 
 # --- FastAPI Lifecycle ---
 @asynccontextmanager
@@ -464,25 +468,19 @@ async def wa_promo_received(request: Request):
             return {"success": False, "error": "No companies for this bot"}
         
         # Layer 1: Fuzzy match (fast, free)
-        from userbot_manager import match_company_in_text
-        matched_company = None
+        from userbot_manager import build_company_index, find_company_in_text
+        company_index = build_company_index(companies)
         
         # Priority 1: Match by group name (most reliable)
-        for company in companies:
-            keywords = company.get('keywords', '')
-            if match_company_in_text(company['name'], group_name, keywords):
-                matched_company = company
-                logger.info(f"📱 WA Layer 1 match (group name): '{company['name']}' in group '{group_name}'")
-                break
+        matched_company = find_company_in_text(companies, company_index, group_name)
+        if matched_company:
+            logger.info(f"📱 WA Layer 1 match (group name): '{matched_company['name']}' in group '{group_name}'")
         
         # Priority 2: Match by message text
         if not matched_company and text:
-            for company in companies:
-                keywords = company.get('keywords', '')
-                if match_company_in_text(company['name'], text, keywords):
-                    matched_company = company
-                    logger.info(f"📱 WA Layer 1 match (text): '{company['name']}' in group '{group_name}'")
-                    break
+            matched_company = find_company_in_text(companies, company_index, text)
+            if matched_company:
+                logger.info(f"📱 WA Layer 1 match (text): '{matched_company['name']}' in group '{group_name}'")
         
         # Layer 2: AI detection (if Layer 1 fails and there's text)
         if not matched_company and text:
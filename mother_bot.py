@@ -1,31 +1,217 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes, ConversationHandler
+from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.request import HTTPXRequest
+from telegram.ext import (
+    Application, ApplicationHandlerStop, CommandHandler, CallbackQueryHandler, MessageHandler,
+    TypeHandler, filters, ContextTypes, ConversationHandler
+)
 from database import Database
 from config import MASTER_ADMIN_ID, MASTER_ADMIN_IDS, MOTHER_TOKEN
+import asyncio
 import logging
 import datetime
+import html
+import re
+import time
+from functools import lru_cache
+from typing import Final
 
 TOKEN_INPUT = 0
 CLONE_TOKEN = 1
 
+_MASTER = MASTER_ADMIN_ID
+# Env-configured admins, frozen once for O(1) membership checks
+_ADMINS = frozenset(MASTER_ADMIN_IDS)
+
+# Callback routing: per-bot actions "<action>_<bot_id>" and fixed literal buttons
+_CB_BOT_ACTION = re.compile(r"^(manage_bot|toggle_bot|confirm_delete_bot|stats|analytics)_(\d+)$")
+_CB_LITERAL = re.compile(r"^(?:new_bot|close_panel|my_bots_panel)$")
+
+# How long a bot row fetched for the management panel stays fresh (seconds)
+_BOT_CACHE_TTL = 5.0
+
+# Spawn/stop requests arriving within this window (seconds) are run together, up to the max
+_SPAWN_BATCH_WINDOW = 0.05
+_SPAWN_BATCH_MAX = 16
+
+# BotFather token: numeric bot id, colon, secret (real secrets are 35 chars)
+_TOKEN_RE = re.compile(r'^\d{6,12}:[A-Za-z0-9_-]{30,}$')
+
+
+# Static messages are sent as plain text (nothing for PTB/Telegram to parse)
+_START_TEXT: Final = (
+    "🤖 Welcome to MASUK10 ROBOT!\n\n"
+    "Create your own Company List Bot in seconds.\n\n"
+    "✨ Features included:\n"
+    "✅ Company Listing & Search\n"
+    "✅ Referral System (RM1/invite)\n"
+    "✅ Wallet & Withdrawal\n"
+    "✅ Custom Welcome Message\n"
+    "✅ Admin Dashboard\n\n"
+    "👇 Get Started:\n"
+    "/createbot - Create new bot\n"
+    "/mybots - Manage your bots\n\n"
+    "━━━━━━━━━━━━━━━━━\n"
+    "🔧 Powered by MASUK10"
+)
+
+_ADMIN_HELP_TEXT: Final = (
+    "👑 Owner Commands\n\n"
+    "View & Manage Bots:\n"
+    "/allbots - View all bots\n"
+    "/extend [bot_id] [days] - Extend subscription\n\n"
+    "User Management:\n"
+    "/ban [user_id ...] - Blacklist user(s)\n\n"
+    "Owner Management:\n"
+    "/owners - List platform owners\n"
+    "/addowner [id] - Add owner\n"
+    "/removeowner [id] - Remove owner\n\n"
+    "Server:\n"
+    "/server - CPU/RAM/Disk usage\n\n"
+    "Config:\n"
+    "/setglobalad [text] - Set global ad"
+)
+
+_NO_BOTS_TEXT: Final = "You have no bots. Use /createbot to start."
+
+_HELP_TEXT: Final = "Commands:\n/createbot - New Bot\n/mybots - List Bots"
+
+_MAIN_MENU_TEXT: Final = (
+    "🤖 MASUK10 ROBOT\n\n"
+    "Use commands below:\n"
+    "/mybots - Manage your bots\n"
+    "/createbot - Create new bot\n"
+    "/help - Show help"
+)
+
+# HTML
+_CREATE_BOT_TEXT: Final = (
+    "🚀 <b>Create New Bot</b>\n\n"
+    "1. Go to @BotFather\n"
+    "2. Create a new bot (<code>/newbot</code>)\n"
+    "3. Copy the <b>API TOKEN</b>\n\n"
+    "Paste the API TOKEN here:"
+)
+
+# Owner notification after /extend or the Add Days buttons (HTML)
+_EXTENDED_NOTIFY_TEMPLATE: Final = (
+    "🎉 <b>SUBSCRIPTION EXTENDED!</b>\n\n"
+    "🤖 <b>Bot:</b> @{bot_username}\n"
+    "➕ <b>Added:</b> {days} days\n"
+    "📅 <b>New Expiry:</b> {new_expiry}\n"
+    "⏳ <b>Days Left:</b> {days_left} days\n\n"
+    "<i>Terima kasih! Bot anda sekarang aktif.</i>"
+)
+
+
+@lru_cache(maxsize=256)
+def _back_markup(bot_id: int) -> InlineKeyboardMarkup:
+    """« Back to the bot's management panel (markups are immutable, so safe to share)"""
+    return InlineKeyboardMarkup([[InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]])
+
+
+_BACK_TO_MY_BOTS_ROW: Final = (InlineKeyboardButton("« Back to My Bots", callback_data="my_bots_panel"),)
+_CREATE_NEW_ROW: Final = (InlineKeyboardButton("➕ Create New Bot", callback_data="new_bot"),)
+_CLOSE_ROW: Final = (InlineKeyboardButton("❌ Close", callback_data="close_panel"),)
+
+
+@lru_cache(maxsize=256)
+def _panel_rows(bot_id: int):
+    """Fixed rows of a bot's management panel: (rows above the toggle, extend row, delete row)"""
+    head = (
+        (InlineKeyboardButton("📊 Statistics", callback_data=f"stats_{bot_id}"),
+         InlineKeyboardButton("👥 Users", callback_data=f"users_{bot_id}")),
+        (InlineKeyboardButton("📈 Analytics", callback_data=f"analytics_{bot_id}"),),
+        (InlineKeyboardButton("🧬 Clone Bot", callback_data=f"clone_bot_{bot_id}"),),
+    )
+    extend = (InlineKeyboardButton("📅 Extend Subscription", callback_data=f"extend_sub_{bot_id}"),)
+    delete = (InlineKeyboardButton("🗑️ Delete Bot", callback_data=f"delete_bot_{bot_id}"),)
+    return head, extend, delete
+
 class MotherBot:
     def __init__(self, token, db: Database, bot_manager):
         self.token = token
         self.db = db
         self.manager = bot_manager
         self.app = Application.builder().token(token).build()
+        # One keep-alive HTTP pool for getMe checks on user-submitted tokens
+        self._probe_request = HTTPXRequest()
+        self.db.init_pool()
+        # Platform owners from DB, kept in sync by add_owner/remove_owner
+        self._owner_set = self.db.get_platform_owner_ids()
+        # PTB-side gates: updates from anyone else never reach the handler
+        self._owner_filter = filters.User(user_id=_ADMINS | {_MASTER} | self._owner_set)
+        self._master_filter = filters.User(user_id=_MASTER)
+        # bot_id -> (fetched_at, bot row, parsed subscription_end); refreshed by toggle/extend, dropped by delete
+        self._bot_cache = {}
+        # Banned Telegram IDs, loaded in initialize() and extended by /ban
+        self._banned = set()
+        # (bot_id, start: bool, token, on_done | None), consumed by _spawn_worker
+        self._spawn_q = asyncio.Queue()
+        self._spawn_task = None
         self.setup_handlers()
 
     async def initialize(self):
-        """Prepare bot application but do not start polling (Webhook mode)"""
+        """Prepare bot application but do not start polling.
+
+        Updates arrive via the FastAPI /webhook/{token} route (BotManager.process_update);
+        BotManager.enable_bot_updates registers the webhook, or polls only on non-HTTPS hosts.
+        """
+        self._banned = await asyncio.to_thread(self.db.get_blacklisted_user_ids)
         await self.app.initialize()
         await self.app.start()
+        self._spawn_task = asyncio.create_task(self._spawn_worker())
 
     async def stop(self):
+        if self._spawn_task:
+            self._spawn_task.cancel()
         await self.app.stop()
         await self.app.shutdown()
 
+    def _queue_spawn(self, bot, on_done=None):
+        """Queue a child bot start; BotManager.spawn_bot only reads id and token.
+
+        on_done(ok, error) is awaited by the worker once the start has actually run.
+        """
+        self._spawn_q.put_nowait((bot['id'], True, bot['token'], on_done))
+
+    def _queue_stop(self, bot_id, token, on_done=None):
+        """Queue a child bot stop (token given, so it works after the row is deleted); on_done as for _queue_spawn"""
+        self._spawn_q.put_nowait((bot_id, False, token, on_done))
+
+    async def _spawn_worker(self):
+        """Start/stop child bots off the handler path, overlapping the Telegram calls of a batch"""
+        while True:
+            bot_id, *request = await self._spawn_q.get()
+            await asyncio.sleep(_SPAWN_BATCH_WINDOW)
+            # Latest request per bot wins, so a quick start+stop (or start+delete) never runs out of order
+            batch = {bot_id: request}
+            while len(batch) < _SPAWN_BATCH_MAX and not self._spawn_q.empty():
+                bot_id, *request = self._spawn_q.get_nowait()
+                batch[bot_id] = request
+            results = await asyncio.gather(
+                *(self.manager.spawn_bot({'id': bot_id, 'token': token}) if start
+                  else self.manager.stop_bot(bot_id, token=token)
+                  for bot_id, (start, token, _) in batch.items()),
+                return_exceptions=True
+            )
+            notifications = []
+            for (bot_id, (start, token, on_done)), result in zip(batch.items(), results):
+                error = result if isinstance(result, Exception) else None
+                if error:
+                    logging.error(f"❌ Spawn/stop failed for bot {bot_id}: {error}")
+                if not on_done:
+                    continue
+                # spawn_bot/stop_bot log and swallow their own errors; whether the bot is hooked is the real signal
+                ok = not error and (token in self.manager.bots) == start
+                notifications.append(on_done(ok, error))
+            for result in await asyncio.gather(*notifications, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logging.error(f"❌ Spawn/stop notification failed: {result}")
+
     def setup_handlers(self):
+        # Group -1 runs before every other handler: drop banned users before any DB or API work
+        self.app.add_handler(TypeHandler(Update, self._reject_banned), group=-1)
+
         self.app.add_handler(CommandHandler("start", self.start_command))
         self.app.add_handler(CommandHandler("mybots", self.my_bots))
         self.app.add_handler(CommandHandler("help", self.help_command))
@@ -46,52 +232,55 @@ class MotherBot:
             self.handle_clone_token
         ))
         
-        # Callback Handler for buttons
-        self.app.add_handler(CallbackQueryHandler(self.handle_callback))
+        # Callback Handlers for buttons (routed by callback_data pattern)
+        self._bot_actions = {
+            'manage_bot': self.show_bot_management,
+            'toggle_bot': self.toggle_bot_status,
+            'confirm_delete_bot': self.delete_bot,
+            'stats': self.show_bot_stats,
+            'analytics': self.show_bot_analytics,
+        }
+        self._literal_callbacks = {
+            'new_bot': self._cb_new_bot,
+            'close_panel': self._cb_close_panel,
+            'my_bots_panel': self._cb_my_bots_panel,
+        }
+        self.app.add_handler(CallbackQueryHandler(self._cb_bot_action, pattern=_CB_BOT_ACTION))
+        self.app.add_handler(CallbackQueryHandler(self._cb_literal, pattern=_CB_LITERAL))
+        self.app.add_handler(CallbackQueryHandler(self._cb_delete_prompt, pattern=r"^delete_bot_(\d+)$"))
+        self.app.add_handler(CallbackQueryHandler(self._cb_users, pattern=r"^users_(\d+)(?:_(\d+))?$"))
+        self.app.add_handler(CallbackQueryHandler(self._cb_clone, pattern=r"^clone_bot_(\d+)$"))
+        self.app.add_handler(CallbackQueryHandler(self._cb_extend_prompt, pattern=r"^extend_sub_(\d+)$"))
+        self.app.add_handler(CallbackQueryHandler(self._cb_add_days, pattern=r"^add_days_(\d+)_(\d+)$"))
+        self.app.add_handler(CallbackQueryHandler(self._cb_unknown))
 
         # Admin Commands
-        self.app.add_handler(CommandHandler("setglobalad", self.set_global_ad))
-        self.app.add_handler(CommandHandler("ban", self.ban_user))
-        self.app.add_handler(CommandHandler("extend", self.extend_subscription))
-        self.app.add_handler(CommandHandler("admin", self.admin_help))
+        self.app.add_handler(CommandHandler("setglobalad", self.set_global_ad, filters=self._owner_filter))
+        self.app.add_handler(CommandHandler("ban", self.ban_user, filters=self._owner_filter))
+        self.app.add_handler(CommandHandler("extend", self.extend_subscription, filters=self._owner_filter))
+        self.app.add_handler(CommandHandler("admin", self.admin_help, filters=self._owner_filter))
         self.app.add_handler(CommandHandler("allbots", self.all_bots))
         # Owner Management
-        self.app.add_handler(CommandHandler("addowner", self.add_owner))
-        self.app.add_handler(CommandHandler("removeowner", self.remove_owner))
-        self.app.add_handler(CommandHandler("owners", self.list_owners))
-        self.app.add_handler(CommandHandler("server", self.server_status))
+        self.app.add_handler(CommandHandler("addowner", self.add_owner, filters=self._master_filter))
+        self.app.add_handler(CommandHandler("removeowner", self.remove_owner, filters=self._master_filter))
+        self.app.add_handler(CommandHandler("owners", self.list_owners, filters=self._owner_filter))
+        self.app.add_handler(CommandHandler("server", self.server_status, filters=self._owner_filter))
+
+    async def _reject_banned(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        # Admins and owners can never be locked out, even if their ID was banned
+        if user and user.id in self._banned and not self.is_owner(user.id):
+            raise ApplicationHandlerStop
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        text = (
-            "🤖 **Welcome to MASUK10 ROBOT!**\n\n"
-            "Create your own **Company List Bot** in seconds.\n\n"
-            "✨ **Features included:**\n"
-            "✅ Company Listing & Search\n"
-            "✅ Referral System (RM1/invite)\n"
-            "✅ Wallet & Withdrawal\n"
-            "✅ Custom Welcome Message\n"
-            "✅ Admin Dashboard\n\n"
-            "👇 **Get Started:**\n"
-            "/createbot - Create new bot\n"
-            "/mybots - Manage your bots\n\n"
-            "━━━━━━━━━━━━━━━━━\n"
-            "🔧 Powered by **MASUK10**"
-        )
-        await update.message.reply_text(text, parse_mode='Markdown')
+        await update.message.reply_text(_START_TEXT)
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("Commands:\n/createbot - New Bot\n/mybots - List Bots")
+        await update.message.reply_text(_HELP_TEXT)
 
     # --- Create Bot Flow ---
     async def create_bot_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text(
-            "🚀 **Create New Bot**\n\n"
-            "1. Go to @BotFather\n"
-            "2. Create a new bot (`/newbot`)\n"
-            "3. Copy the **API TOKEN**\n\n"
-            "Paste the API TOKEN here:",
-            parse_mode='Markdown'
-        )
+        await update.message.reply_text(_CREATE_BOT_TEXT, parse_mode='HTML')
         return TOKEN_INPUT
 
     async def create_bot_token(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -99,16 +288,14 @@ class MotherBot:
         user_id = update.effective_user.id
         username = update.effective_user.username or "User"
 
-        # Validate Token format (Simple check)
-        if ':' not in token or len(token) < 20:
+        # Validate Token format
+        if not _TOKEN_RE.match(token):
             await update.message.reply_text("❌ Invalid Token format. Try again or /cancel")
             return TOKEN_INPUT
 
         # Fetch bot info from Telegram to get username
         try:
-            from telegram import Bot
-            temp_bot = Bot(token)
-            bot_info = await temp_bot.get_me()
+            bot_info = await self._fetch_bot_info(token)
             bot_username = bot_info.username
             bot_name = bot_info.first_name
         except Exception as e:
@@ -116,261 +303,252 @@ class MotherBot:
             return TOKEN_INPUT
 
         # Register in DB
-        success, msg = self.db.create_bot(token, user_id, bot_username)
+        success, msg, bot_data = await asyncio.to_thread(self.db.create_bot, token, user_id, bot_username)
         
         if success:
-            await update.message.reply_text("✅ **Bot Registered!**\nStarting your bot instance...", parse_mode='Markdown')
-            # Start the bot dynamically
-            try:
-                # Fetch the bot data we just inserted
-                bot_data = self.db.get_bot_by_token(token)
-                await self.manager.spawn_bot(bot_data)
-                
-                # Show detailed success message
-                bot_link = f"https://t.me/{bot_username}"
-                success_msg = (
-                    f"🎉 **Bot is ONLINE!**\n\n"
-                    f"📱 **Bot Info:**\n"
-                    f"• Name: {bot_name}\n"
-                    f"• Username: @{bot_username}\n"
-                    f"• Link: {bot_link}\n"
-                    f"• ID: #{bot_data['id']}\n\n"
-                    f"📅 **Subscription:** Trial 3 Days\n"
-                    f"⏰ **Expires:** {bot_data['subscription_end'][:10]}\n\n"
-                    f"✨ Go to your bot and type /start to begin!\n\n"
-                    f"━━━━━━━━━━━━━━━━━\n"
-                    f"🔧 Powered by **MASUK10 ROBOT**"
-                )
-                await update.message.reply_text(success_msg, parse_mode='Markdown')
-            except Exception as e:
-                await update.message.reply_text(f"⚠️ Registered but failed to start: {e}")
+            status_msg = await update.message.reply_text("✅ <b>Bot Registered!</b>\n⏳ Starting bot…", parse_mode='HTML')
+            
+            # Show detailed success message
+            bot_link = f"https://t.me/{bot_username}"
+            success_msg = (
+                f"🎉 <b>Bot is ONLINE!</b>\n\n"
+                f"📱 <b>Bot Info:</b>\n"
+                f"• Name: {html.escape(bot_name)}\n"
+                f"• Username: @{bot_username}\n"
+                f"• Link: {bot_link}\n"
+                f"• ID: #{bot_data['id']}\n\n"
+                f"📅 <b>Subscription:</b> Trial 3 Days\n"
+                f"⏰ <b>Expires:</b> {bot_data['subscription_end'][:10]}\n\n"
+                f"✨ Go to your bot and type /start to begin!\n\n"
+                f"━━━━━━━━━━━━━━━━━\n"
+                f"🔧 Powered by <b>MASUK10 ROBOT</b>"
+            )
+            
+            async def report_start(ok, error):
+                if ok:
+                    await status_msg.edit_text(success_msg, parse_mode='HTML')
+                else:
+                    await status_msg.edit_text(
+                        f"⚠️ Registered but failed to start: {html.escape(str(error or 'see server logs'))}",
+                        parse_mode='HTML'
+                    )
+            
+            # Start the bot in the background spawn worker, which reports back via report_start
+            self._queue_spawn(bot_data, report_start)
             return ConversationHandler.END
         else:
             await update.message.reply_text(f"❌ Error: {msg}\nTry /createbot again.")
             return ConversationHandler.END
 
 
+    async def _fetch_bot_info(self, token):
+        """getMe for a candidate token, reusing the shared probe connection pool"""
+        return await Bot(token, request=self._probe_request).get_me()
+
     async def cancel(self, update, context):
         await update.message.reply_text("Cancelled.")
         return ConversationHandler.END
     
-    async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle button clicks for Mother Bot"""
+    async def _cb_bot_action(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """manage/toggle/confirm-delete/stats/analytics for one bot, dispatched from a single match"""
+        action, bot_id = context.match.groups()
+        # toggle_bot answers with the new started/stopped state itself
+        if action != 'toggle_bot':
+            await update.callback_query.answer()
+        await self._bot_actions[action](update, int(bot_id))
+
+    async def _cb_literal(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await self._literal_callbacks[update.callback_query.data](update, context)
+
+    async def _cb_new_bot(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
-        data = query.data
         await query.answer()
-        
-        if data.startswith("manage_bot_"):
-            bot_id = int(data.split("_")[2])
-            await self.show_bot_management(update, bot_id)
-        elif data == "new_bot":
-            await query.message.reply_text("Use /createbot to create a new bot.")
-        elif data.startswith("toggle_bot_"):
-            bot_id = int(data.split("_")[2])
-            await self.toggle_bot_status(update, bot_id)
-        elif data.startswith("delete_bot_"):
-            bot_id = int(data.split("_")[2])
-            # Show confirmation dialog
-            bot = self.db.get_bot_by_id(bot_id)
-            
-            # Get stats for confirmation message
-            companies_count = len(self.db.get_companies(bot_id))
-            users = self.db.execute_query("SELECT COUNT(*) as count FROM users WHERE bot_id = ?", (bot_id,))
-            users_count = users[0]['count'] if users else 0
-            
-            text = (
-                f"⚠️ **DELETE BOT CONFIRMATION**\n\n"
-                f"Are you sure you want to delete Bot #{bot_id}?\n\n"
-                f"**This will DELETE:**\n"
-                f"❌ All companies ({companies_count} items)\n"
-                f"❌ All user data ({users_count} users)\n"
-                f"❌ All withdrawal requests\n"
-                f"❌ Bot configuration\n\n"
-                f"**⚠️ THIS CANNOT BE UNDONE!**"
-            )
-            
-            keyboard = [
-                [InlineKeyboardButton("✅ YES, DELETE", callback_data=f"confirm_delete_bot_{bot_id}")],
-                [InlineKeyboardButton("❌ Cancel", callback_data=f"manage_bot_{bot_id}")]
-            ]
-            
-            await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-        elif data.startswith("confirm_delete_bot_"):
-            # Actually delete
-            bot_id = int(data.split("_")[3])
-            await self.delete_bot(update, bot_id)
-        elif data.startswith("stats_"):
-            bot_id = int(data.split("_")[1])
-            await self.show_bot_stats(update, bot_id)
-        elif data.startswith("users_"):
-            bot_id = int(data.split("_")[1])
-            await self.show_bot_users(update, bot_id)
-        elif data.startswith("analytics_"):
-            bot_id = int(data.split("_")[1])
-            await self.show_bot_analytics(update, bot_id)
-        elif data.startswith("clone_bot_"):
-            # Start clone wizard
-            bot_id = int(data.split("_")[2])
-            context.user_data['clone_source_bot'] = bot_id
-            
-            text = (
-                f"🧬 **CLONE BOT #{bot_id}**\n\n"
-                f"Clone akan copy semua:\n"
-                f"✅ Companies & buttons\n"
-                f"✅ Menu buttons\n"
-                f"✅ Bot settings\n\n"
-                f"⚠️ **TIDAK termasuk:**\n"
-                f"❌ User data\n"
-                f"❌ Balance/Referrals\n\n"
-                f"📌 **Sila hantar token bot BARU:**\n"
-                f"_(Boleh create bot baru di @BotFather)_"
-            )
-            
-            keyboard = [[InlineKeyboardButton("❌ Cancel", callback_data=f"manage_bot_{bot_id}")]]
-            await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-            return  # Wait for token input
-        elif data.startswith("extend_sub_"):
-            # Show extend subscription options
-            bot_id = int(data.split("_")[2])
-            bot = self.db.get_bot_by_id(bot_id)
-            
-            # Calculate current expiry
-            try:
-                expiry = datetime.datetime.fromisoformat(bot['subscription_end'])
-                days_left = (expiry - datetime.datetime.now()).days
-                expiry_text = f"{expiry.strftime('%Y-%m-%d')} ({days_left} days left)"
-            except:
-                expiry_text = bot['subscription_end'][:10]
-            
-            text = (
-                f"📅 **EXTEND SUBSCRIPTION**\n\n"
-                f"**Bot:** #{bot_id}\n"
-                f"**Current Expiry:** {expiry_text}\n\n"
-                f"Select days to add:"
-            )
-            
-            keyboard = [
-                [InlineKeyboardButton("➕ 7 Days", callback_data=f"add_days_{bot_id}_7"),
-                 InlineKeyboardButton("➕ 14 Days", callback_data=f"add_days_{bot_id}_14")],
-                [InlineKeyboardButton("➕ 30 Days", callback_data=f"add_days_{bot_id}_30"),
-                 InlineKeyboardButton("➕ 60 Days", callback_data=f"add_days_{bot_id}_60")],
-                [InlineKeyboardButton("➕ 90 Days", callback_data=f"add_days_{bot_id}_90"),
-                 InlineKeyboardButton("➕ 180 Days", callback_data=f"add_days_{bot_id}_180")],
-                [InlineKeyboardButton("➕ 365 Days (1 Year)", callback_data=f"add_days_{bot_id}_365")],
-                [InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]
-            ]
-            
-            await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-        elif data.startswith("add_days_"):
-            # Actually extend subscription
-            parts = data.split("_")
-            bot_id = int(parts[2])
-            days = int(parts[3])
-            
-            # Check if user is admin
-            if update.effective_user.id not in MASTER_ADMIN_IDS:
-                await query.message.reply_text("⛔ Access Denied")
-                return
-            
-            # Get current expiry
-            bot = self.db.get_bot_by_id(bot_id)
+        await query.message.reply_text("Use /createbot to create a new bot.")
+
+    async def _cb_delete_prompt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show confirmation dialog before deleting a bot"""
+        query = update.callback_query
+        await query.answer()
+        bot_id = int(context.match.group(1))
+
+        # Get stats for confirmation message
+        companies_count = await asyncio.to_thread(self.db.count_companies, bot_id)
+        users_count = await asyncio.to_thread(self.db.count_bot_users, bot_id)
+
+        text = (
+            f"⚠️ <b>DELETE BOT CONFIRMATION</b>\n\n"
+            f"Are you sure you want to delete Bot #{bot_id}?\n\n"
+            f"<b>This will DELETE:</b>\n"
+            f"❌ All companies ({companies_count} items)\n"
+            f"❌ All user data ({users_count} users)\n"
+            f"❌ All withdrawal requests\n"
+            f"❌ Bot configuration\n\n"
+            f"<b>⚠️ THIS CANNOT BE UNDONE!</b>"
+        )
+
+        keyboard = [
+            [InlineKeyboardButton("✅ YES, DELETE", callback_data=f"confirm_delete_bot_{bot_id}")],
+            [InlineKeyboardButton("❌ Cancel", callback_data=f"manage_bot_{bot_id}")]
+        ]
+
+        await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+
+    async def _cb_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.answer()
+        after_id = context.match.group(2)
+        await self.show_bot_users(update, int(context.match.group(1)), int(after_id) if after_id else None)
+
+    async def _cb_clone(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Start clone wizard — token input is picked up by handle_clone_token"""
+        query = update.callback_query
+        await query.answer()
+        bot_id = int(context.match.group(1))
+        context.user_data['clone_source_bot'] = bot_id
+
+        text = (
+            f"🧬 <b>CLONE BOT #{bot_id}</b>\n\n"
+            f"Clone akan copy semua:\n"
+            f"✅ Companies &amp; buttons\n"
+            f"✅ Menu buttons\n"
+            f"✅ Bot settings\n\n"
+            f"⚠️ <b>TIDAK termasuk:</b>\n"
+            f"❌ User data\n"
+            f"❌ Balance/Referrals\n\n"
+            f"📌 <b>Sila hantar token bot BARU:</b>\n"
+            f"<i>(Boleh create bot baru di @BotFather)</i>"
+        )
+
+        keyboard = [[InlineKeyboardButton("❌ Cancel", callback_data=f"manage_bot_{bot_id}")]]
+        await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+
+    async def _cb_extend_prompt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show extend subscription options"""
+        query = update.callback_query
+        await query.answer()
+        bot_id = int(context.match.group(1))
+        bot = await asyncio.to_thread(self.db.get_bot_by_id, bot_id)
+
+        # Calculate current expiry
+        try:
+            expiry = datetime.datetime.fromisoformat(bot['subscription_end'])
+            days_left = (expiry - datetime.datetime.now()).days
+            expiry_text = f"{expiry.strftime('%Y-%m-%d')} ({days_left} days left)"
+        except:
+            expiry_text = bot['subscription_end'][:10]
+
+        text = (
+            f"📅 <b>EXTEND SUBSCRIPTION</b>\n\n"
+            f"<b>Bot:</b> #{bot_id}\n"
+            f"<b>Current Expiry:</b> {expiry_text}\n\n"
+            f"Select days to add:"
+        )
+
+        keyboard = [
+            [InlineKeyboardButton("➕ 7 Days", callback_data=f"add_days_{bot_id}_7"),
+             InlineKeyboardButton("➕ 14 Days", callback_data=f"add_days_{bot_id}_14")],
+            [InlineKeyboardButton("➕ 30 Days", callback_data=f"add_days_{bot_id}_30"),
+             InlineKeyboardButton("➕ 60 Days", callback_data=f"add_days_{bot_id}_60")],
+            [InlineKeyboardButton("➕ 90 Days", callback_data=f"add_days_{bot_id}_90"),
+             InlineKeyboardButton("➕ 180 Days", callback_data=f"add_days_{bot_id}_180")],
+            [InlineKeyboardButton("➕ 365 Days (1 Year)", callback_data=f"add_days_{bot_id}_365")],
+            [InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]
+        ]
+
+        await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+
+    async def _cb_add_days(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Actually extend subscription"""
+        query = update.callback_query
+        await query.answer()
+        bot_id, days = int(context.match.group(1)), int(context.match.group(2))
+
+        # Check if user is admin
+        if update.effective_user.id not in _ADMINS:
+            await query.message.reply_text("⛔ Access Denied")
+            return
+
+        # Extend from current expiry (or from now if already expired)
+        now = datetime.datetime.now()
+        bot, new_expiry = await asyncio.to_thread(self.db.extend_bot_subscription, bot_id, days, now)
+        if not bot:
+            self._bot_cache.pop(bot_id, None)
+            await query.message.edit_text("❌ Bot not found.")
+            return
+        self._cache_bot({**bot, 'subscription_end': new_expiry.isoformat()}, new_expiry)
+
+        # Get bot username for notification
+        bot_username = bot.get('bot_username') or f"Bot #{bot_id}"
+        owner_id = bot.get('owner_id')
+
+        await query.message.edit_text(
+            f"✅ <b>Subscription Extended!</b>\n\n"
+            f"<b>Bot:</b> #{bot_id}\n"
+            f"<b>Added:</b> {days} days\n"
+            f"<b>New Expiry:</b> {new_expiry.strftime('%Y-%m-%d')}\n\n"
+            f"Use /mybots to see updated info.",
+            parse_mode='HTML'
+        )
+
+        # Notify bot owner
+        if owner_id and owner_id != update.effective_user.id:
             try:
-                current_expiry = datetime.datetime.fromisoformat(bot['subscription_end'])
-                # If expired, start from now
-                if current_expiry < datetime.datetime.now():
-                    current_expiry = datetime.datetime.now()
-            except:
-                current_expiry = datetime.datetime.now()
-            
-            # Calculate new expiry
-            new_expiry = current_expiry + datetime.timedelta(days=days)
-            
-            # Update database
-            conn = self.db.get_connection()
-            conn.execute("UPDATE bots SET subscription_end = ? WHERE id = ?", 
-                        (new_expiry.isoformat(), bot_id))
-            conn.commit()
-            conn.close()
-            
-            # Get bot username for notification
-            bot_username = bot.get('bot_username') or f"Bot #{bot_id}"
-            owner_id = bot.get('owner_id')
-            
-            await query.message.edit_text(
-                f"✅ **Subscription Extended!**\n\n"
-                f"**Bot:** #{bot_id}\n"
-                f"**Added:** {days} days\n"
-                f"**New Expiry:** {new_expiry.strftime('%Y-%m-%d')}\n\n"
-                f"Use /mybots to see updated info.",
-                parse_mode='Markdown'
-            )
-            
-            # Notify bot owner
-            if owner_id and owner_id != update.effective_user.id:
-                try:
-                    days_left = (new_expiry - datetime.datetime.now()).days
-                    notify_text = (
-                        f"🎉 **SUBSCRIPTION EXTENDED!**\n\n"
-                        f"🤖 **Bot:** @{bot_username}\n"
-                        f"➕ **Added:** {days} days\n"
-                        f"📅 **New Expiry:** {new_expiry.strftime('%Y-%m-%d')}\n"
-                        f"⏳ **Days Left:** {days_left} days\n\n"
-                        f"_Terima kasih! Bot anda sekarang aktif._"
-                    )
-                    await self.app.bot.send_message(
-                        chat_id=owner_id,
-                        text=notify_text,
-                        parse_mode='Markdown'
-                    )
-                except Exception as e:
-                    logging.error(f"Failed to notify owner {owner_id}: {e}")
-        elif data == "close_panel":
-            # Carousel style - edit to show main menu instead of delete
-            text = (
-                "🤖 **MASUK10 ROBOT**\n\n"
-                "Use commands below:\n"
-                "/mybots - Manage your bots\n"
-                "/createbot - Create new bot\n"
-                "/help - Show help"
-            )
-            await query.message.edit_text(text, parse_mode='Markdown')
-        elif data == "my_bots_panel":
-            await self.my_bots_panel(update)
+                notify_text = _EXTENDED_NOTIFY_TEMPLATE.format_map({
+                    'bot_username': bot_username,
+                    'days': days,
+                    'new_expiry': new_expiry.strftime('%Y-%m-%d'),
+                    'days_left': (new_expiry - now).days,
+                })
+                await self.app.bot.send_message(
+                    chat_id=owner_id,
+                    text=notify_text,
+                    parse_mode='HTML'
+                )
+            except Exception as e:
+                logging.error(f"Failed to notify owner {owner_id}: {e}")
+
+    async def _cb_close_panel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        # Carousel style - edit to show main menu instead of delete
+        query = update.callback_query
+        await query.answer()
+        await query.message.edit_text(_MAIN_MENU_TEXT)
+
+    async def _cb_my_bots_panel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.answer()
+        await self.my_bots_panel(update)
+
+    async def _cb_unknown(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Acknowledge stale or unrecognised buttons so the client spinner stops"""
+        await update.callback_query.answer()
 
     # --- My Bots ---
     async def my_bots(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
-        conn = self.db.get_connection()
         
         # Master Admins see ALL bots, regular users see only their own
-        if user_id in MASTER_ADMIN_IDS:
-            bots = conn.execute("SELECT * FROM bots ORDER BY id").fetchall()
-            title = "🤖 **ALL PLATFORM BOTS**"
-            is_admin = True
-        else:
-            bots = conn.execute("SELECT * FROM bots WHERE owner_id = ?", (user_id,)).fetchall()
-            title = "🤖 **YOUR BOTS**"
-            is_admin = False
+        is_admin = user_id in _ADMINS
+        title = "🤖 <b>ALL PLATFORM BOTS</b>" if is_admin else "🤖 <b>YOUR BOTS</b>"
+        bots = await asyncio.to_thread(self.db.get_bots_overview, None if is_admin else user_id)
 
         if not bots:
-            await update.message.reply_text("You have no bots. /createbot to start.")
-            conn.close()
+            await update.message.reply_text(_NO_BOTS_TEXT)
             return
 
-        # Build detailed text
-        text = f"{title}\n"
-        text += "━" * 20 + "\n\n"
+        text, keyboard = self._render_bots_list(bots, title, is_admin)
         
-        keyboard = []
-        for bot in bots:
-            # Get stats
-            user_count = conn.execute("SELECT COUNT(*) FROM users WHERE bot_id = ?", (bot['id'],)).fetchone()[0]
-            company_count = conn.execute("SELECT COUNT(*) FROM companies WHERE bot_id = ?", (bot['id'],)).fetchone()[0]
-            
+        keyboard.append(_CREATE_NEW_ROW)
+        await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    
+    def _render_bots_list(self, bots, title, is_admin):
+        """Build the /mybots text and per-bot Manage buttons"""
+        divider = "━" * 20 + "\n\n"
+        parts = [f"{title}\n", divider]
+        names = [f"@{bot['bot_username']}" if bot['bot_username'] else f"Bot #{bot['id']}" for bot in bots]
+        
+        now = datetime.datetime.now()
+        for bot, bot_name in zip(bots, names):
             # Calculate days left
             try:
                 expiry = datetime.datetime.fromisoformat(bot['subscription_end'])
-                now = datetime.datetime.now()
                 days_left = (expiry - now).days
                 if days_left < 0:
                     days_text = f"⚠️ EXPIRED {abs(days_left)} days ago"
@@ -381,143 +559,85 @@ class MotherBot:
                 else:
                     days_text = f"✅ {days_left} days left"
             except:
-                days_text = bot['subscription_end'][:10]
+                days_text = bot['subscription_end_date']
             
             # Status
             status = "🟢 ACTIVE" if bot['is_active'] else "🔴 STOPPED"
             
-            # Bot info line - sqlite3.Row doesn't support .get()
-            try:
-                bot_username = bot['bot_username'] if bot['bot_username'] else None
-            except:
-                bot_username = None
-            
-            if bot_username:
-                bot_name = f"@{bot_username}"
-                bot_link = f"https://t.me/{bot_username}"
-                text += f"**{bot_name}** {status}\n"
-                text += f"🔗 {bot_link}\n"
-            else:
-                text += f"**Bot #{bot['id']}** {status}\n"
+            parts.append(f"<b>{bot_name}</b> {status}\n")
+            if bot['bot_username']:
+                parts.append(f"🔗 https://t.me/{bot['bot_username']}\n")
             
-            text += f"👥 Users: {user_count} | 🏢 Companies: {company_count}\n"
+            parts.append(f"👥 Users: {bot['user_count']} | 🏢 Companies: {bot['company_count']}\n")
             
             # Show owner for admin view
             if is_admin:
-                text += f"👤 Owner ID: `{bot['owner_id']}`\n"
+                parts.append(f"👤 Owner ID: <code>{bot['owner_id']}</code>\n")
             
-            text += f"📅 {days_text}\n"
-            text += "━" * 20 + "\n\n"
-            
-            # Button
-            keyboard.append([InlineKeyboardButton(
-                f"🔧 Manage {bot_name}",
-                callback_data=f"manage_bot_{bot['id']}"
-            )])
-        
-        conn.close()
+            parts.append(f"📅 {days_text}\n")
+            parts.append(divider)
         
-        keyboard.append([InlineKeyboardButton("➕ Create New Bot", callback_data="new_bot")])
-        await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+        keyboard = [
+            [InlineKeyboardButton(f"🔧 Manage {bot_name}", callback_data=f"manage_bot_{bot['id']}")]
+            for bot, bot_name in zip(bots, names)
+        ]
+        return "".join(parts), keyboard
     
     async def my_bots_panel(self, update: Update):
         """Carousel-style my bots - edit existing message instead of new"""
         user_id = update.effective_user.id
-        conn = self.db.get_connection()
         
         # Master Admins see ALL bots, regular users see only their own
-        if user_id in MASTER_ADMIN_IDS:
-            bots = conn.execute("SELECT * FROM bots ORDER BY id").fetchall()
-            title = "🤖 **ALL PLATFORM BOTS**"
-            is_admin = True
-        else:
-            bots = conn.execute("SELECT * FROM bots WHERE owner_id = ?", (user_id,)).fetchall()
-            title = "🤖 **YOUR BOTS**"
-            is_admin = False
+        is_admin = user_id in _ADMINS
+        title = "🤖 <b>ALL PLATFORM BOTS</b>" if is_admin else "🤖 <b>YOUR BOTS</b>"
+        bots = await asyncio.to_thread(self.db.get_bots_overview, None if is_admin else user_id)
 
         if not bots:
-            await update.callback_query.message.edit_text("You have no bots. Use /createbot to start.")
-            conn.close()
+            await update.callback_query.message.edit_text(_NO_BOTS_TEXT)
             return
 
-        # Build detailed text
-        text = f"{title}\n"
-        text += "━" * 20 + "\n\n"
+        text, keyboard = self._render_bots_list(bots, title, is_admin)
         
-        keyboard = []
-        for bot in bots:
-            # Get stats
-            user_count = conn.execute("SELECT COUNT(*) FROM users WHERE bot_id = ?", (bot['id'],)).fetchone()[0]
-            company_count = conn.execute("SELECT COUNT(*) FROM companies WHERE bot_id = ?", (bot['id'],)).fetchone()[0]
-            
-            # Calculate days left
+        keyboard.append(_CREATE_NEW_ROW)
+        keyboard.append(_CLOSE_ROW)
+        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    
+    def _cache_bot(self, bot, expiry=None):
+        """Cache a bot row with its parsed subscription_end (None if unparseable); returns the expiry"""
+        if expiry is None:
             try:
                 expiry = datetime.datetime.fromisoformat(bot['subscription_end'])
-                now = datetime.datetime.now()
-                days_left = (expiry - now).days
-                if days_left < 0:
-                    days_text = f"⚠️ EXPIRED {abs(days_left)} days ago"
-                elif days_left == 0:
-                    days_text = "⚠️ Expires TODAY"
-                elif days_left <= 7:
-                    days_text = f"⚠️ {days_left} days left"
-                else:
-                    days_text = f"✅ {days_left} days left"
-            except:
-                days_text = bot['subscription_end'][:10]
-            
-            # Status
-            status = "🟢 ACTIVE" if bot['is_active'] else "🔴 STOPPED"
-            
-            # Bot info line - sqlite3.Row doesn't support .get()
-            try:
-                bot_username = bot['bot_username'] if bot['bot_username'] else None
-            except:
-                bot_username = None
-            
-            if bot_username:
-                bot_name = f"@{bot_username}"
-                bot_link = f"https://t.me/{bot_username}"
-                text += f"**{bot_name}** {status}\n"
-                text += f"🔗 {bot_link}\n"
-            else:
-                bot_name = f"Bot #{bot['id']}"
-                text += f"**{bot_name}** {status}\n"
-            
-            text += f"👥 Users: {user_count} | 🏢 Companies: {company_count}\n"
-            
-            # Show owner for admin view
-            if is_admin:
-                text += f"👤 Owner ID: `{bot['owner_id']}`\n"
-            
-            text += f"📅 {days_text}\n"
-            text += "━" * 20 + "\n\n"
-            
-            # Button
-            keyboard.append([InlineKeyboardButton(
-                f"🔧 Manage {bot_name}",
-                callback_data=f"manage_bot_{bot['id']}"
-            )])
-        
-        conn.close()
-        
-        keyboard.append([InlineKeyboardButton("➕ Create New Bot", callback_data="new_bot")])
-        keyboard.append([InlineKeyboardButton("❌ Close", callback_data="close_panel")])
-        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    
-    async def show_bot_management(self, update: Update, bot_id: int):
-        """Display management panel for a specific bot"""
-        bot = self.db.get_bot_by_id(bot_id)
+            except (TypeError, ValueError):
+                pass
+        self._bot_cache[bot['id']] = (time.monotonic(), bot, expiry)
+        return expiry
+
+    async def _get_bot_cached(self, bot_id):
+        """(bot row, parsed expiry) for the management panel, reused for a few seconds across Back/Manage clicks"""
+        cached = self._bot_cache.get(bot_id)
+        if cached and time.monotonic() - cached[0] < _BOT_CACHE_TTL:
+            return cached[1], cached[2]
+        bot = await asyncio.to_thread(self.db.get_bot_by_id, bot_id)
+        if not bot:
+            return None, None
+        return bot, self._cache_bot(bot)
+
+    async def show_bot_management(self, update: Update, bot_id: int, bot: dict = None):
+        """Display management panel for a specific bot (pass `bot` to reuse an already-fetched row)"""
+        if bot is None:
+            bot, expiry = await self._get_bot_cached(bot_id)
+        else:
+            expiry = self._cache_bot(bot)
         if not bot:
             await update.callback_query.message.reply_text("❌ Bot not found.")
             return
         
         # Check if subscription expired
-        try:
-            expiry = datetime.datetime.fromisoformat(bot['subscription_end'])
-            is_expired = datetime.datetime.now() > expiry
-            days_left = (expiry - datetime.datetime.now()).days
-        except:
+        now = datetime.datetime.now()
+        if expiry is not None:
+            is_expired = now > expiry
+            days_left = (expiry - now).days
+        else:
             is_expired = False
             days_left = 0
         
@@ -536,104 +656,85 @@ class MotherBot:
             status_detail = "Manually stopped"
             
         text = (
-            f"🤖 **Bot #{bot['id']} Management**\n\n"
-            f"**Status:** {status}\n"
-            f"**Subscription:** {status_detail}\n"
-            f"**Token:** `{bot['token'][:15]}...`\n"
-            f"**Expires:** {bot['subscription_end'][:10]}\n"
-            f"**Created:** {bot['created_at'][:10]}\n"
+            f"🤖 <b>Bot #{bot['id']} Management</b>\n\n"
+            f"<b>Status:</b> {status}\n"
+            f"<b>Subscription:</b> {status_detail}\n"
+            f"<b>Token:</b> <code>{bot['token'][:15]}...</code>\n"
+            f"<b>Expires:</b> {bot['subscription_end'][:10]}\n"
+            f"<b>Created:</b> {bot['created_at'][:10]}\n"
         )
         
+        # Only the toggle row depends on state; the rest are shared per bot_id
+        head_rows, extend_row, delete_row = _panel_rows(bot_id)
         toggle_text = "⏸️ Stop Bot" if bot['is_active'] else "▶️ Start Bot"
-        keyboard = [
-            [InlineKeyboardButton("📊 Statistics", callback_data=f"stats_{bot_id}"), 
-             InlineKeyboardButton("👥 Users", callback_data=f"users_{bot_id}")],
-            [InlineKeyboardButton("📈 Analytics", callback_data=f"analytics_{bot_id}")],
-            [InlineKeyboardButton("🧬 Clone Bot", callback_data=f"clone_bot_{bot_id}")],
-            [InlineKeyboardButton(toggle_text, callback_data=f"toggle_bot_{bot_id}")],
-        ]
+        keyboard = [*head_rows, (InlineKeyboardButton(toggle_text, callback_data=f"toggle_bot_{bot_id}"),)]
         
         # Master Admin can extend subscription
         user_id = update.effective_user.id
-        if user_id in MASTER_ADMIN_IDS:
-            keyboard.append([InlineKeyboardButton("📅 Extend Subscription", callback_data=f"extend_sub_{bot_id}")])
+        if user_id in _ADMINS:
+            keyboard.append(extend_row)
         
-        keyboard.append([InlineKeyboardButton("🗑️ Delete Bot", callback_data=f"delete_bot_{bot_id}")])
-        keyboard.append([InlineKeyboardButton("« Back to My Bots", callback_data="my_bots_panel")])
-        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+        keyboard.append(delete_row)
+        keyboard.append(_BACK_TO_MY_BOTS_ROW)
+        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
     
     async def toggle_bot_status(self, update: Update, bot_id: int):
         """Start or stop a bot"""
-        conn = self.db.get_connection()
-        bot = conn.execute("SELECT * FROM bots WHERE id = ?", (bot_id,)).fetchone()
+        bot = await asyncio.to_thread(self.db.toggle_bot_active, bot_id)
         
         if not bot:
+            self._bot_cache.pop(bot_id, None)
+            await update.callback_query.answer()
             await update.callback_query.message.edit_text("❌ Bot not found.")
-            conn.close()
             return
         
-        new_status = 0 if bot['is_active'] else 1
-        conn.execute("UPDATE bots SET is_active = ? WHERE id = ?", (new_status, bot_id))
-        conn.commit()
-        conn.close()
+        message = update.callback_query.message
         
-        # Reload the management panel
-        if new_status:
-            # Start the bot instance
-            try:
-                await self.manager.spawn_bot(dict(bot))
-                await update.callback_query.answer("✅ Bot started!")
-            except Exception as e:
-                await update.callback_query.answer(f"⚠️ Error: {e}")
+        async def report_failure(ok, error):
+            if not ok:
+                await message.reply_text(f"⚠️ Error: {error or 'bot failed to start, see server logs'}")
+        
+        # Start/stop the bot instance in the background; failures are reported as a follow-up
+        if bot['is_active']:
+            self._queue_spawn(bot, report_failure)
+            await update.callback_query.answer("✅ Bot started!")
         else:
-            # Stop the bot instance
-            try:
-                await self.manager.stop_bot(bot_id)
-                await update.callback_query.answer("⏸️ Bot stopped!")
-            except Exception as e:
-                await update.callback_query.answer(f"⚠️ Error: {e}")
+            self._queue_stop(bot_id, bot['token'], report_failure)
+            await update.callback_query.answer("⏸️ Bot stopped!")
         
-        await self.show_bot_management(update, bot_id)
+        # Reload the management panel
+        await self.show_bot_management(update, bot_id, bot)
     
     async def delete_bot(self, update: Update, bot_id: int):
         """Delete a bot from the system"""
         try:
-            # Stop the bot first
-            await self.manager.stop_bot(bot_id)
+            # Delete bot and its companies/users/withdrawals in one transaction
+            deleted = await asyncio.to_thread(self.db.delete_bot, bot_id)
+            self._bot_cache.pop(bot_id, None)
+            if deleted is None:
+                # Another admin (or a double tap) got there first
+                await update.callback_query.message.edit_text("ℹ️ Already deleted.")
+                return
+            
+            message = update.callback_query.message
             
-            # Delete from database
-            conn = self.db.get_connection()
-            conn.execute("DELETE FROM bots WHERE id = ?", (bot_id,))
-            conn.commit()
-            conn.close()
+            async def report_failure(ok, error):
+                if not ok:
+                    await message.reply_text(f"⚠️ Bot deleted but its instance failed to stop: {error or 'see server logs'}")
             
-            await update.callback_query.message.edit_text("✅ Bot deleted successfully!")
+            # Stop the running instance through the spawn queue, so a start still queued for
+            # this bot can't run after it; the row is gone, so hand over its token
+            self._queue_stop(bot_id, deleted['token'], report_failure)
+            
+            await message.edit_text("✅ Bot deleted successfully!")
         except Exception as e:
             await update.callback_query.message.edit_text(f"❌ Error deleting bot: {e}")
 
     # --- Admin Commands ---
     async def admin_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        if not self.is_owner(update.effective_user.id): return
-        await update.message.reply_text(
-            "👑 **Owner Commands**\n\n"
-            "**View & Manage Bots:**\n"
-            "/allbots - View all bots\n"
-            "/extend [bot_id] [days] - Extend subscription\n\n"
-            "**User Management:**\n"
-            "/ban [user_id] - Blacklist user\n\n"
-            "**Owner Management:**\n"
-            "/owners - List platform owners\n"
-            "/addowner [id] - Add owner\n"
-            "/removeowner [id] - Remove owner\n\n"
-            "**Server:**\n"
-            "/server - CPU/RAM/Disk usage\n\n"
-            "**Config:**\n"
-            "/setglobalad [text] - Set global ad",
-            parse_mode='Markdown'
-        )
+        await update.message.reply_text(_ADMIN_HELP_TEXT)
 
     async def set_global_ad(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        if not self.is_owner(update.effective_user.id): return
         # Logic to update config file or DB? 
         # For simplicity, we just replied "Updated" but functionally we rely on `config.DEFAULT_GLOBAL_AD`. 
         # Ideally, `DEFAULT_GLOBAL_AD` should be in DB. `settings` table. 
@@ -644,19 +745,28 @@ class MotherBot:
         await update.message.reply_text("⚠️ To change Global Ad, please update `config.py` in the server.")
 
     async def ban_user(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        if not self.is_owner(update.effective_user.id): return
-        # Ban logic
-        user_id = int(context.args[0])
-        conn = self.db.get_connection()
-        conn.execute("UPDATE users SET is_blacklisted = 1 WHERE telegram_id = ?", (user_id,))
-        conn.commit()
-        conn.close()
-        await update.message.reply_text(f"🚫 User {user_id} Banned.")
+        # Ban logic: /ban id1 id2 ... -> one transaction, persisted even for IDs with no users row
+        if not context.args:
+            await update.message.reply_text("Usage: /ban [user_id] ...")
+            return
+        
+        invalid = [arg for arg in context.args if not arg.lstrip('-').isdigit()]
+        if invalid:
+            await update.message.reply_text(f"❌ Invalid user ID: {', '.join(invalid)}")
+            return
+        
+        user_ids = [int(arg) for arg in context.args]
+        protected = [uid for uid in user_ids if self.is_owner(uid)]
+        if protected:
+            await update.message.reply_text(f"❌ Cannot ban admin/owner: {', '.join(map(str, protected))}")
+            return
+        
+        await asyncio.to_thread(self.db.ban_platform_users, user_ids, update.effective_user.id)
+        self._banned.update(user_ids)
+        await update.message.reply_text(f"🚫 User {', '.join(map(str, user_ids))} Banned.")
     
     async def extend_subscription(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Extend bot subscription by X days (Admin only)"""
-        if not self.is_owner(update.effective_user.id): return
-        
         if len(context.args) < 2:
             await update.message.reply_text("Usage: /extend [bot_id] [days]")
             return
@@ -664,29 +774,19 @@ class MotherBot:
         bot_id = int(context.args[0])
         days = int(context.args[1])
         
-        conn = self.db.get_connection()
-        bot = conn.execute("SELECT * FROM bots WHERE id = ?", (bot_id,)).fetchone()
+        now = datetime.datetime.now()
+        # Extend subscription (from now if already expired)
+        bot, new_end = await asyncio.to_thread(self.db.extend_bot_subscription, bot_id, days, now)
         
         if not bot:
+            self._bot_cache.pop(bot_id, None)
             await update.message.reply_text("❌ Bot not found.")
-            conn.close()
             return
+        self._cache_bot({**bot, 'subscription_end': new_end.isoformat()}, new_end)
         
-        # Extend subscription
-        from datetime import datetime, timedelta
-        current_end = datetime.fromisoformat(bot['subscription_end'])
-        # If expired, start from now
-        if current_end < datetime.now():
-            current_end = datetime.now()
-        new_end = current_end + timedelta(days=days)
+        days_left = (new_end - now).days
         
-        conn.execute("UPDATE bots SET subscription_end = ? WHERE id = ?", (new_end.isoformat(), bot_id))
-        conn.commit()
-        conn.close()
-        
-        days_left = (new_end - datetime.now()).days
-        
-        await update.message.reply_text(f"✅ **Bot #{bot_id}** subscription extended by {days} days!\nNew expiry: {new_end.strftime('%Y-%m-%d')}", parse_mode='Markdown')
+        await update.message.reply_text(f"✅ <b>Bot #{bot_id}</b> subscription extended by {days} days!\nNew expiry: {new_end.strftime('%Y-%m-%d')}", parse_mode='HTML')
         
         # Notify bot owner
         owner_id = bot['owner_id']
@@ -694,18 +794,16 @@ class MotherBot:
         
         if owner_id and owner_id != update.effective_user.id:
             try:
-                notify_text = (
-                    f"🎉 **SUBSCRIPTION EXTENDED!**\n\n"
-                    f"🤖 **Bot:** @{bot_username}\n"
-                    f"➕ **Added:** {days} days\n"
-                    f"📅 **New Expiry:** {new_end.strftime('%Y-%m-%d')}\n"
-                    f"⏳ **Days Left:** {days_left} days\n\n"
-                    f"_Terima kasih! Bot anda sekarang aktif._"
-                )
+                notify_text = _EXTENDED_NOTIFY_TEMPLATE.format_map({
+                    'bot_username': bot_username,
+                    'days': days,
+                    'new_expiry': new_end.strftime('%Y-%m-%d'),
+                    'days_left': days_left,
+                })
                 await self.app.bot.send_message(
                     chat_id=owner_id,
                     text=notify_text,
-                    parse_mode='Markdown'
+                    parse_mode='HTML'
                 )
             except Exception as e:
                 logging.error(f"Failed to notify owner {owner_id}: {e}")
@@ -716,55 +814,45 @@ class MotherBot:
             await update.message.reply_text("⛔ Access Denied.")
             return
         
-        conn = self.db.get_connection()
-        bots = conn.execute("""
-            SELECT b.*, 
-                   (SELECT COUNT(*) FROM users WHERE bot_id = b.id) as user_count
-            FROM bots b 
-            ORDER BY b.created_at DESC
-        """).fetchall()
-        conn.close()
+        bots = await asyncio.to_thread(self.db.get_all_bots_with_user_counts)
         
         if not bots:
             await update.message.reply_text("📭 No bots registered yet.")
             return
         
         # Build message with pagination (max 10 per message)
-        text = f"📊 **ALL BOTS** ({len(bots)} total)\n\n"
+        text = f"📊 <b>ALL BOTS</b> ({len(bots)} total)\n\n"
         
         for i, bot in enumerate(bots, 1):
             status = "🟢" if bot['is_active'] else "🔴"
             expiry = bot['subscription_end'][:10] if bot['subscription_end'] else "N/A"
             text += (
-                f"**{i}. Bot #{bot['id']}** {status}\n"
-                f"   👤 Owner: `{bot['owner_id']}`\n"
+                f"<b>{i}. Bot #{bot['id']}</b> {status}\n"
+                f"   👤 Owner: <code>{bot['owner_id']}</code>\n"
                 f"   📅 Exp: {expiry}\n"
                 f"   👥 Users: {bot['user_count']}\n\n"
             )
             
             # Split message if too long
             if i % 10 == 0 and i < len(bots):
-                await update.message.reply_text(text, parse_mode='Markdown')
+                await update.message.reply_text(text, parse_mode='HTML')
                 text = ""
         
         if text:
-            text += "_Use /extend [bot_id] [days] to extend subscription_"
-            await update.message.reply_text(text, parse_mode='Markdown')
+            text += "<i>Use /extend [bot_id] [days] to extend subscription</i>"
+            await update.message.reply_text(text, parse_mode='HTML')
 
     # --- Owner Management ---
     def is_owner(self, user_id):
         """Check if user is platform owner (env + database)"""
         # Check env variable first
-        if user_id == MASTER_ADMIN_ID or user_id in MASTER_ADMIN_IDS:
+        if user_id == _MASTER or user_id in _ADMINS:
             return True
-        # Check database
-        return self.db.is_platform_owner(user_id, MASTER_ADMIN_ID)
+        # Check cached database owners
+        return user_id in self._owner_set
 
     async def server_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show server CPU, RAM, Disk usage (Admin only)"""
-        if not self.is_owner(update.effective_user.id):
-            return
-
         try:
             import psutil
             import time
@@ -792,40 +880,35 @@ class MotherBot:
             active_bots = len(self.manager.bots) if self.manager else 0
 
             text = (
-                f"🖥 **SERVER STATUS**\n"
+                f"🖥 <b>SERVER STATUS</b>\n"
                 f"━━━━━━━━━━━━━━━━━\n\n"
-                f"{cpu_warn} **CPU:** {cpu}%\n"
-                f"`{bar(cpu)}` \n\n"
-                f"{ram_warn} **RAM:** {mem.used / (1024**3):.1f}/{mem.total / (1024**3):.1f} GB ({mem.percent}%)\n"
-                f"`{bar(mem.percent)}` \n\n"
-                f"{disk_warn} **Disk:** {disk.used / (1024**3):.1f}/{disk.total / (1024**3):.1f} GB ({disk.percent:.0f}%)\n"
-                f"`{bar(disk.percent)}` \n\n"
-                f"🕐 **Uptime:** {days}d {hours}h {mins}m\n"
-                f"🤖 **Active Bots:** {active_bots}\n"
+                f"{cpu_warn} <b>CPU:</b> {cpu}%\n"
+                f"<code>{bar(cpu)}</code> \n\n"
+                f"{ram_warn} <b>RAM:</b> {mem.used / (1024**3):.1f}/{mem.total / (1024**3):.1f} GB ({mem.percent}%)\n"
+                f"<code>{bar(mem.percent)}</code> \n\n"
+                f"{disk_warn} <b>Disk:</b> {disk.used / (1024**3):.1f}/{disk.total / (1024**3):.1f} GB ({disk.percent:.0f}%)\n"
+                f"<code>{bar(disk.percent)}</code> \n\n"
+                f"🕐 <b>Uptime:</b> {days}d {hours}h {mins}m\n"
+                f"🤖 <b>Active Bots:</b> {active_bots}\n"
             )
 
             # Overall health
             if mem.percent > 85 or cpu > 90:
-                text += "\n🔴 **Status: CRITICAL** — High resource usage!"
+                text += "\n🔴 <b>Status: CRITICAL</b> — High resource usage!"
             elif mem.percent > 70 or cpu > 70:
-                text += "\n🟡 **Status: WARNING** — Monitor closely"
+                text += "\n🟡 <b>Status: WARNING</b> — Monitor closely"
             else:
-                text += "\n🟢 **Status: HEALTHY**"
+                text += "\n🟢 <b>Status: HEALTHY</b>"
 
-            await update.message.reply_text(text, parse_mode='Markdown')
+            await update.message.reply_text(text, parse_mode='HTML')
 
         except ImportError:
-            await update.message.reply_text("❌ `psutil` not installed on server.", parse_mode='Markdown')
+            await update.message.reply_text("❌ <code>psutil</code> not installed on server.", parse_mode='HTML')
         except Exception as e:
             await update.message.reply_text(f"❌ Error: {e}")
     
     async def add_owner(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Add a platform owner /addowner [telegram_id]"""
-        # Only master admin (from env) can add owners
-        if update.effective_user.id != MASTER_ADMIN_ID:
-            await update.message.reply_text("⛔ Only the master admin can add owners.")
-            return
-        
         if not context.args:
             await update.message.reply_text("Usage: /addowner [telegram_id]\n\nExample: /addowner 123456789")
             return
@@ -836,25 +919,22 @@ class MotherBot:
             await update.message.reply_text("⚠️ Invalid Telegram ID")
             return
         
-        success = self.db.add_platform_owner(new_owner_id, update.effective_user.id)
+        success = await asyncio.to_thread(self.db.add_platform_owner, new_owner_id, update.effective_user.id)
         
         if success:
+            self._owner_set.add(new_owner_id)
+            self._owner_filter.add_user_ids(new_owner_id)
             await update.message.reply_text(
-                f"✅ **Owner Added!**\n\n"
-                f"👤 Telegram ID: `{new_owner_id}`\n\n"
+                f"✅ <b>Owner Added!</b>\n\n"
+                f"👤 Telegram ID: <code>{new_owner_id}</code>\n\n"
                 f"User now has full access to all admin commands.",
-                parse_mode='Markdown'
+                parse_mode='HTML'
             )
         else:
             await update.message.reply_text("⚠️ User is already an owner.")
     
     async def remove_owner(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Remove a platform owner /removeowner [telegram_id]"""
-        # Only master admin can remove owners
-        if update.effective_user.id != MASTER_ADMIN_ID:
-            await update.message.reply_text("⛔ Only the master admin can remove owners.")
-            return
-        
         if not context.args:
             await update.message.reply_text("Usage: /removeowner [telegram_id]")
             return
@@ -866,136 +946,103 @@ class MotherBot:
             return
         
         # Cannot remove master admin
-        if owner_id == MASTER_ADMIN_ID:
+        if owner_id == _MASTER:
             await update.message.reply_text("⚠️ Cannot remove the master admin.")
             return
         
-        success = self.db.remove_platform_owner(owner_id)
+        success = await asyncio.to_thread(self.db.remove_platform_owner, owner_id)
         
         if success:
-            await update.message.reply_text(f"✅ Owner `{owner_id}` removed!", parse_mode='Markdown')
+            self._owner_set.discard(owner_id)
+            if owner_id not in _ADMINS:
+                self._owner_filter.remove_user_ids(owner_id)
+            await update.message.reply_text(f"✅ Owner <code>{owner_id}</code> removed!", parse_mode='HTML')
         else:
             await update.message.reply_text("⚠️ Owner not found.")
     
     async def list_owners(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """List all platform owners"""
-        if not self.is_owner(update.effective_user.id):
-            return
-        
-        owners = self.db.get_platform_owners()
+        owners = await asyncio.to_thread(self.db.get_platform_owners)
         
-        text = f"👑 **PLATFORM OWNERS**\n\n"
-        text += f"**Master Admin:** `{MASTER_ADMIN_ID}` (from env)\n\n"
+        parts = ["👑 PLATFORM OWNERS\n\n", f"Master Admin: {_MASTER} (from env)\n\n"]
         
         if owners:
-            text += "**Added Owners:**\n"
-            for i, owner in enumerate(owners, 1):
-                text += f"{i}. `{owner['telegram_id']}`\n"
+            parts.append("Added Owners:\n")
+            parts.extend(f"{i}. {owner['telegram_id']}\n" for i, owner in enumerate(owners, 1))
         else:
-            text += "_No additional owners added_"
+            parts.append("No additional owners added")
+        text = "".join(parts)
         
-        await update.message.reply_text(text, parse_mode='Markdown')
+        await update.message.reply_text(text)
 
     # --- New Management Functions ---
     async def show_bot_stats(self, update: Update, bot_id: int):
         """Show comprehensive bot statistics"""
-        conn = self.db.get_connection()
-        
-        # Get bot info
-        bot = conn.execute("SELECT * FROM bots WHERE id = ?", (bot_id,)).fetchone()
-        
-        # Get stats
-        total_users = conn.execute("SELECT COUNT(*) as count FROM users WHERE bot_id = ?", (bot_id,)).fetchone()['count']
-        total_companies = conn.execute("SELECT COUNT(*) as count FROM companies WHERE bot_id = ?", (bot_id,)).fetchone()['count']
-        total_balance = conn.execute("SELECT SUM(balance) as total FROM users WHERE bot_id = ?", (bot_id,)).fetchone()['total'] or 0
-        total_invites = conn.execute("SELECT SUM(total_invites) as total FROM users WHERE bot_id = ?", (bot_id,)).fetchone()['total'] or 0
-        pending_withdrawals = conn.execute("SELECT COUNT(*) as count FROM withdrawals WHERE bot_id = ? AND status = 'PENDING'", (bot_id,)).fetchone()['count']
-        
-        conn.close()
+        stats = await asyncio.to_thread(self.db.get_bot_stats, bot_id)
+        bot = stats['bot']
         
         text = (
-            f"📊 **Bot #{bot_id} Statistics**\n\n"
-            f"👥 **Total Users:** {total_users}\n"
-            f"🏢 **Total Companies:** {total_companies}\n"
-            f"💰 **Total Balance:** RM {total_balance:.2f}\n"
-            f"📈 **Total Invites:** {total_invites}\n"
-            f"📤 **Pending Withdrawals:** {pending_withdrawals}\n\n"
-            f"**Status:** {'🟢 Active' if bot['is_active'] else '🔴 Stopped'}\n"
-            f"**Subscription:** {bot['subscription_end'][:10]}"
+            f"📊 <b>Bot #{bot_id} Statistics</b>\n\n"
+            f"👥 <b>Total Users:</b> {stats['total_users']}\n"
+            f"🏢 <b>Total Companies:</b> {stats['total_companies']}\n"
+            f"💰 <b>Total Balance:</b> RM {stats['total_balance']:.2f}\n"
+            f"📈 <b>Total Invites:</b> {stats['total_invites']}\n"
+            f"📤 <b>Pending Withdrawals:</b> {stats['pending_withdrawals']}\n\n"
+            f"<b>Status:</b> {'🟢 Active' if bot['is_active'] else '🔴 Stopped'}\n"
+            f"<b>Subscription:</b> {bot['subscription_end'][:10]}"
         )
         
-        keyboard = [[InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]]
-        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+        await update.callback_query.message.edit_text(text, reply_markup=_back_markup(bot_id), parse_mode='HTML')
     
-    async def show_bot_users(self, update: Update, bot_id: int):
-        """Show list of users for specific bot"""
-        conn = self.db.get_connection()
-        users = conn.execute(
-            "SELECT telegram_id, balance, total_invites, joined_at FROM users WHERE bot_id = ? ORDER BY joined_at DESC LIMIT 20",
-            (bot_id,)
-        ).fetchall()
-        conn.close()
+    async def show_bot_users(self, update: Update, bot_id: int, after_id: int = None):
+        """Show list of users for specific bot (20 per page, keyset-paginated)"""
+        page_size = 20
+        # Fetch one extra row to know whether a next page exists
+        users = await asyncio.to_thread(self.db.get_bot_users_page, bot_id, page_size + 1, after_id)
+        has_more = len(users) > page_size
+        users = users[:page_size]
         
         if not users:
-            text = f"👥 **Bot #{bot_id} Users**\n\nNo users yet."
+            text = f"👥 Bot #{bot_id} Users\n\nNo users yet."
         else:
-            text = f"👥 **Bot #{bot_id} Users** (Latest 20)\n\n"
-            for user in users:
-                text += f"• ID: `{user['telegram_id']}` | RM {user['balance']:.2f} | {user['total_invites']} invites\n"
+            page_label = "Latest 20" if after_id is None else "Older"
+            parts = [f"👥 Bot #{bot_id} Users ({page_label})\n\n"]
+            parts.extend(
+                f"• ID: {user['telegram_id']} | RM {user['balance']:.2f} | {user['total_invites']} invites\n"
+                for user in users
+            )
+            text = "".join(parts)
         
-        keyboard = [[InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]]
-        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+        if has_more:
+            reply_markup = InlineKeyboardMarkup([
+                [InlineKeyboardButton("Next »", callback_data=f"users_{bot_id}_{users[-1]['id']}")],
+                [InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]
+            ])
+        else:
+            reply_markup = _back_markup(bot_id)
+        # Only numbers are substituted, so send as plain text
+        await update.callback_query.message.edit_text(text, reply_markup=reply_markup)
     
     async def show_bot_analytics(self, update: Update, bot_id: int):
         """Show analytical data for bot"""
-        conn = self.db.get_connection()
-        
-        # Revenue analytics
-        total_balance = conn.execute("SELECT SUM(balance) as total FROM users WHERE bot_id = ?", (bot_id,)).fetchone()['total'] or 0
-        approved_withdrawals = conn.execute(
-            "SELECT SUM(amount) as total FROM withdrawals WHERE bot_id = ? AND status = 'APPROVED'",
-            (bot_id,)
-        ).fetchone()['total'] or 0
-        pending_withdrawals = conn.execute(
-            "SELECT SUM(amount) as total FROM withdrawals WHERE bot_id = ? AND status = 'PENDING'",
-            (bot_id,)
-        ).fetchone()['total'] or 0
-        
-        # Growth analytics
-        users_today = conn.execute(
-            "SELECT COUNT(*) as count FROM users WHERE bot_id = ? AND DATE(joined_at) = DATE('now')",
-            (bot_id,)
-        ).fetchone()['count']
-        users_this_week = conn.execute(
-            "SELECT COUNT(*) as count FROM users WHERE bot_id = ? AND DATE(joined_at) >= DATE('now', '-7 days')",
-            (bot_id,)
-        ).fetchone()['count']
-        
-        # Top referrers
-        top_referrers = conn.execute(
-            "SELECT telegram_id, total_invites FROM users WHERE bot_id = ? ORDER BY total_invites DESC LIMIT 5",
-            (bot_id,)
-        ).fetchall()
-        
-        conn.close()
+        analytics = await asyncio.to_thread(self.db.get_bot_panel_analytics, bot_id)
         
         text = (
-            f"📈 **Bot #{bot_id} Analytics**\n\n"
-            f"💰 **Financial**\n"
-            f"• Current Balance: RM {total_balance:.2f}\n"
-            f"• Paid Out: RM {approved_withdrawals:.2f}\n"
-            f"• Pending: RM {pending_withdrawals:.2f}\n\n"
-            f"📊 **Growth**\n"
-            f"• New Today: {users_today} users\n"
-            f"• This Week: {users_this_week} users\n\n"
-            f"🏆 **Top Referrers**\n"
+            f"📈 <b>Bot #{bot_id} Analytics</b>\n\n"
+            f"💰 <b>Financial</b>\n"
+            f"• Current Balance: RM {analytics['total_balance']:.2f}\n"
+            f"• Paid Out: RM {analytics['approved_withdrawals']:.2f}\n"
+            f"• Pending: RM {analytics['pending_withdrawals']:.2f}\n\n"
+            f"📊 <b>Growth</b>\n"
+            f"• New Today: {analytics['users_today']} users\n"
+            f"• This Week: {analytics['users_this_week']} users\n\n"
+            f"🏆 <b>Top Referrers</b>\n"
         )
         
-        for i, ref in enumerate(top_referrers, 1):
-            text += f"{i}. ID `{ref['telegram_id']}` - {ref['total_invites']} invites\n"
+        for i, ref in enumerate(analytics['top_referrers'], 1):
+            text += f"{i}. ID <code>{ref['telegram_id']}</code> - {ref['total_invites']} invites\n"
         
-        keyboard = [[InlineKeyboardButton("« Back", callback_data=f"manage_bot_{bot_id}")]]
-        await update.callback_query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+        await update.callback_query.message.edit_text(text, reply_markup=_back_markup(bot_id), parse_mode='HTML')
 
     async def handle_clone_token(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle token input for cloning a bot"""
@@ -1008,12 +1055,12 @@ class MotherBot:
         user_id = update.effective_user.id
         
         # Validate token format
-        if ':' not in token:
+        if not _TOKEN_RE.match(token):
             await update.message.reply_text(
                 "❌ Format token tidak sah!\n\n"
-                "Token mesti ada format: `123456789:ABCdefGHI...`\n\n"
+                "Token mesti ada format: <code>123456789:ABCdefGHI...</code>\n\n"
                 "Sila dapatkan token dari @BotFather",
-                parse_mode='Markdown'
+                parse_mode='HTML'
             )
             return
         
@@ -1023,11 +1070,19 @@ class MotherBot:
         except:
             pass
         
+        # Check if bot already registered (before spending a Telegram round-trip)
+        existing = await asyncio.to_thread(self.db.get_bot_by_token, token)
+        if existing:
+            await update.message.reply_text(
+                f"❌ Bot @{existing['bot_username']} sudah didaftarkan!\n\n"
+                f"Sila gunakan token bot lain.",
+                parse_mode='HTML'
+            )
+            return
+        
         # Verify token with Telegram
         try:
-            from telegram import Bot
-            test_bot = Bot(token=token)
-            bot_info = await test_bot.get_me()
+            bot_info = await self._fetch_bot_info(token)
             new_username = bot_info.username
         except Exception as e:
             await update.message.reply_text(
@@ -1037,53 +1092,44 @@ class MotherBot:
             )
             return
         
-        # Check if bot already registered
-        existing = self.db.get_bot_by_token(token)
-        if existing:
-            await update.message.reply_text(
-                f"❌ Bot @{new_username} sudah didaftarkan!\n\n"
-                f"Sila gunakan token bot lain.",
-                parse_mode='Markdown'
-            )
-            return
-        
         # Register new bot
-        success, message = self.db.create_bot(token, user_id, new_username)
+        success, message, new_bot = await asyncio.to_thread(self.db.create_bot, token, user_id, new_username)
         if not success:
             await update.message.reply_text(f"❌ Gagal mendaftar bot: {message}")
             return
         
-        # Get new bot ID
-        new_bot = self.db.get_bot_by_token(token)
         new_bot_id = new_bot['id']
         
         # Clone data from source to target
-        clone_success = self.db.clone_bot_data(source_bot_id, new_bot_id)
+        clone_success = await asyncio.to_thread(self.db.clone_bot_data, source_bot_id, new_bot_id)
         
         # Clear clone mode
         context.user_data.pop('clone_source_bot', None)
         
         if clone_success:
+            message = update.message
+            
+            async def report_failure(ok, error):
+                if not ok:
+                    await message.reply_text(f"⚠️ Bot @{new_username} gagal dihidupkan: {error or 'sila semak server logs'}")
+            
             # Start the new bot
-            try:
-                await self.manager.start_child_bot(new_bot)
-            except Exception as e:
-                logging.error(f"Failed to start cloned bot: {e}")
+            self._queue_spawn(new_bot, report_failure)
             
             await update.message.reply_text(
-                f"✅ **BOT BERJAYA DICLONE!**\n\n"
-                f"**Source:** Bot #{source_bot_id}\n"
-                f"**New Bot:** @{new_username}\n"
-                f"**Bot ID:** #{new_bot_id}\n\n"
-                f"✅ Semua companies & settings telah dicopy!\n\n"
+                f"✅ <b>BOT BERJAYA DICLONE!</b>\n\n"
+                f"<b>Source:</b> Bot #{source_bot_id}\n"
+                f"<b>New Bot:</b> @{new_username}\n"
+                f"<b>Bot ID:</b> #{new_bot_id}\n\n"
+                f"✅ Semua companies &amp; settings telah dicopy!\n\n"
                 f"Gunakan /mybots untuk manage bot baru.",
-                parse_mode='Markdown'
+                parse_mode='HTML'
             )
         else:
             await update.message.reply_text(
-                f"⚠️ **BOT DIDAFTARKAN TETAPI CLONE GAGAL**\n\n"
+                f"⚠️ <b>BOT DIDAFTARKAN TETAPI CLONE GAGAL</b>\n\n"
                 f"Bot @{new_username} telah didaftarkan tetapi "
                 f"data dari source bot gagal dicopy.\n\n"
                 f"Sila tambah content secara manual.",
-                parse_mode='Markdown'
+                parse_mode='HTML'
             )
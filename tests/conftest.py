@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Modules live at the repo root (no package), so make them importable from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database file with the connection pool warmed, as BotManager sets it up"""
+    database = Database(str(tmp_path / "test.db"))
+    database.init_pool()
+    return database
+
+
+@pytest.fixture
+def make_bot(db):
+    """Create a bot and return its id"""
+    def _make(token):
+        success, message, bot = db.create_bot(token, owner_id=1, username=f"bot_{token}")
+        assert success, message
+        return bot['id']
+    return _make
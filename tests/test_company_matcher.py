@@ -0,0 +1,77 @@
+import random
+import re
+
+import pytest
+
+pytest.importorskip("telethon")
+
+from userbot_manager import (  # noqa: E402
+    build_company_index,
+    find_company_in_text,
+    freeze_companies,
+    match_company_in_text,
+)
+
+
+def first_match(companies, text, with_keywords=True):
+    """Reference: the per-company loop find_company_in_text replaces"""
+    text_lower = text.lower()
+    text_stripped = re.sub(r'[^a-z0-9]', '', text_lower)
+    for company in companies:
+        keywords = (company.get('keywords') or '') if with_keywords else ''
+        if match_company_in_text(company['name'], text_lower, text_stripped, keywords):
+            return company
+    return None
+
+
+COMPANIES = freeze_companies([
+    {'name': '🚀CM8 Platform', 'keywords': 'cm8, cm-8'},
+    {'name': '🎮BossBet8', 'keywords': ''},
+    {'name': 'A9', 'keywords': 'a9, a-9'},
+    {'name': 'Mega Win 88', 'keywords': None},
+    {'name': '✨', 'keywords': ''},  # Nothing left to match after stripping
+    {'name': 'Lucky.Star (VIP)', 'keywords': 'lucky star'},
+])
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Join CM8 now for free credit", '🚀CM8 Platform'),
+    ("bossbet8 deposit bonus", '🎮BossBet8'),
+    ("Promo a-9 hari ini", 'A9'),
+    ("M E G A W I N 8 8 jackpot", 'Mega Win 88'),
+    ("mega win 88 and cm8 together", '🚀CM8 Platform'),  # Earliest company in list order wins
+    ("VIP members only", 'Lucky.Star (VIP)'),
+    ("Nothing relevant here", None),
+    ("", None),
+])
+def test_find_company_in_text_examples(text, expected):
+    index = build_company_index(COMPANIES)
+    match = find_company_in_text(COMPANIES, index, text)
+    assert (match['name'] if match else None) == expected
+    assert match == first_match(COMPANIES, text)
+
+
+def test_empty_company_list():
+    companies = freeze_companies([])
+    assert find_company_in_text(companies, build_company_index(companies), "cm8") is None
+
+
+@pytest.mark.parametrize("with_keywords", [True, False])
+def test_find_company_in_text_matches_reference_on_random_cases(with_keywords):
+    rng = random.Random(1234)
+    fragments = ['cm', '8', 'boss', 'bet', 'a9', 'a-9', 'mega', 'win', '88', 'lucky', 'star',
+                 'vip', '🚀', '✨', ' ', '-', '.', 'x', 'promo', 'ÉLAN', 'ß']
+
+    def random_text(max_parts):
+        return ''.join(rng.choice(fragments) for _ in range(rng.randint(0, max_parts)))
+
+    for _ in range(300):
+        companies = freeze_companies([
+            {'name': random_text(4), 'keywords': ', '.join(random_text(2) for _ in range(rng.randint(0, 2)))}
+            for _ in range(rng.randint(1, 6))
+        ])
+        index = build_company_index(companies, with_keywords=with_keywords)
+        for _ in range(10):
+            text = random_text(12)
+            assert find_company_in_text(companies, index, text) == \
+                first_match(companies, text, with_keywords), (companies, text)
@@ -0,0 +1,210 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from database import Database
+
+
+def test_create_bot_returns_new_row(db):
+    success, message, bot = db.create_bot("111:aaa", 1, "first_bot")
+    assert success
+    assert bot['token'] == "111:aaa" and bot['bot_username'] == "first_bot"
+
+    success, message, bot = db.create_bot("111:aaa", 1, "first_bot")
+    assert (success, bot) == (False, None)
+
+
+# --- Batched writes ---
+
+def test_execute_batch_rolls_back_only_failing_op(db, make_bot):
+    bot_id = make_bot("111:aaa")
+    insert = "INSERT INTO menu_buttons (bot_id, text, url) VALUES (?, ?, ?)"
+
+    results = db._execute_batch([
+        (insert, (bot_id, "one", "https://a"), False),
+        ("INSERT INTO no_such_table VALUES (?)", (1,), False),
+        (insert, [(bot_id, "two", "https://b"), (bot_id, "three", "https://c")], True),
+    ])
+
+    assert results[0] == 1
+    assert isinstance(results[1], sqlite3.OperationalError)
+    assert results[2] == 2
+    assert [b['text'] for b in db.get_menu_buttons(bot_id)] == ["one", "two", "three"]
+
+
+def test_execute_batch_rolls_back_partial_executemany(db, make_bot):
+    make_bot("111:aaa")
+
+    # The second row violates UNIQUE(token): the first row of the same op must not survive
+    results = db._execute_batch([(
+        "INSERT INTO bots (token, owner_id) VALUES (?, ?)",
+        [("222:bbb", 1), ("111:aaa", 1)],
+        True,
+    )])
+
+    assert isinstance(results[0], sqlite3.IntegrityError)
+    assert db.get_bot_by_token("222:bbb") is None
+
+
+def test_submit_isolates_failing_write_in_shared_batch(db, make_bot):
+    bot_id = make_bot("111:aaa")
+    insert = "INSERT INTO menu_buttons (bot_id, text, url) VALUES (?, ?, ?)"
+
+    async def run():
+        # Queued in the same tick, so all three share one transaction
+        return await asyncio.gather(
+            db.submit(insert, (bot_id, "one", "https://a")),
+            db.submit("UPDATE no_such_table SET x = 1"),
+            db.submit(insert, (bot_id, "two", "https://b")),
+            return_exceptions=True,
+        )
+
+    first, failed, second = asyncio.run(run())
+
+    assert (first, second) == (1, 1)
+    assert isinstance(failed, sqlite3.OperationalError)
+    assert [b['text'] for b in db.get_menu_buttons(bot_id)] == ["one", "two"]
+
+
+@pytest.mark.parametrize("ticks_before_cancel", [0, 1])  # Before the flush starts / while it runs
+def test_cancelled_flush_releases_waiting_writers(db, make_bot, ticks_before_cancel):
+    bot_id = make_bot("111:aaa")
+    insert = "INSERT INTO menu_buttons (bot_id, text, url) VALUES (?, ?, ?)"
+
+    async def run():
+        pending = asyncio.ensure_future(db.submit(insert, (bot_id, "one", "https://a")))
+        while db._flush_task is None:
+            await asyncio.sleep(0)
+        for _ in range(ticks_before_cancel):
+            await asyncio.sleep(0)
+        db._flush_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        await asyncio.sleep(0)
+        assert db._flush_task is None
+        # The queue recovers for the next write
+        return await db.submit(insert, (bot_id, "two", "https://b"))
+
+    assert asyncio.run(run()) == 1
+
+
+# --- Bot cloning ---
+
+def test_clone_bot_data_copies_companies_buttons_and_settings(db, make_bot):
+    source = make_bot("111:aaa")
+    target = make_bot("222:bbb")
+    other = make_bot("333:ccc")
+
+    # Interleave another bot's companies so source ids are not contiguous
+    for i in range(3):
+        db.add_company(source, f"Company {i}", f"desc {i}", f"file{i}", "photo", None, None)
+        db.add_company(other, f"Other {i}", "", None, None, None, None)
+    source_companies = db.get_companies(source)
+    for n, company in enumerate(source_companies):
+        for j in range(n + 1):
+            db.add_company_button(company['id'], f"{company['name']} btn {j}", f"https://x/{j}")
+    db.add_menu_button(source, "Menu", "https://menu")
+
+    with db.write_conn() as conn:
+        conn.execute(
+            "UPDATE bots SET custom_banner = 'banner', custom_caption = 'caption', referral_enabled = 0 WHERE id = ?",
+            (source,),
+        )
+
+    assert db.clone_bot_data(source, target)
+
+    def company_rows(bot_id):
+        return [
+            (c['name'], c['description'], c['media_file_id'], c['media_type'],
+             [(b['text'], b['url'], b['row_group']) for b in db.get_company_buttons(c['id'])])
+            for c in sorted(db.get_companies(bot_id), key=lambda c: c['id'])
+        ]
+
+    assert company_rows(target) == company_rows(source)
+    assert [(b['text'], b['url']) for b in db.get_menu_buttons(target)] == [("Menu", "https://menu")]
+
+    target_bot = db.get_bot_by_id(target)
+    assert (target_bot['custom_banner'], target_bot['custom_caption'], target_bot['referral_enabled']) == \
+        ("banner", "caption", 0)
+    # The other bot is untouched
+    assert len(db.get_companies(other)) == 3
+
+
+# --- User list paging ---
+
+def test_get_bot_users_page_walks_every_user_once(db, make_bot):
+    bot_id = make_bot("111:aaa")
+    other = make_bot("222:bbb")
+    # Several users share a joined_at, so the id tiebreak is exercised
+    joined = ["2024-01-03", "2024-01-01", "2024-01-02", "2024-01-02", "2024-01-02", "2024-01-01", "2024-01-04"]
+    with db.write_conn() as conn:
+        for n, day in enumerate(joined):
+            conn.execute(
+                "INSERT INTO users (bot_id, telegram_id, joined_at) VALUES (?, ?, ?)",
+                (bot_id, 1000 + n, f"{day} 10:00:00"),
+            )
+            conn.execute(
+                "INSERT INTO users (bot_id, telegram_id, joined_at) VALUES (?, ?, ?)",
+                (other, 1000 + n, f"{day} 10:00:00"),
+            )
+
+    with db.read_conn() as conn:
+        expected = [row['id'] for row in conn.execute(
+            "SELECT id FROM users WHERE bot_id = ? ORDER BY joined_at DESC, id", (bot_id,)
+        )]
+
+    seen = []
+    after_id = None
+    while True:
+        page = db.get_bot_users_page(bot_id, limit=3, after_id=after_id)
+        if not page:
+            break
+        assert len(page) <= 3
+        seen.extend(row['id'] for row in page)
+        after_id = page[-1]['id']
+
+    assert seen == expected
+
+
+def test_get_bot_users_page_empty_bot(db, make_bot):
+    assert db.get_bot_users_page(make_bot("111:aaa")) == []
+
+
+# --- Bot deletion ---
+
+def test_delete_bots_removes_child_rows(db, make_bot):
+    keep = make_bot("111:aaa")
+    gone = [make_bot("222:bbb"), make_bot("333:ccc")]
+    for bot_id in [keep, *gone]:
+        db.add_company(bot_id, "Company", "", None, None, None, None)
+        db.add_company_button(db.get_companies(bot_id)[0]['id'], "btn", "https://x")
+        db.add_user(bot_id, 42)
+
+    deleted = db.delete_bots([*gone, 999])
+
+    assert sorted(row['id'] for row in deleted) == sorted(gone)
+    assert db.delete_bot(gone[0]) is None
+    with db.read_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM company_buttons").fetchone()[0] == 1
+        assert [row['bot_id'] for row in conn.execute("SELECT bot_id FROM users")] == [keep]
+    assert db.get_bot_by_id(keep) is not None
+
+
+@pytest.mark.parametrize("bot_ids", [[], ()])
+def test_delete_bots_nothing_to_delete(db, bot_ids):
+    assert db.delete_bots(bot_ids) == []
+
+
+# --- Platform bans ---
+
+def test_bans_persist_for_users_without_rows(db, make_bot, tmp_path):
+    bot_id = make_bot("111:aaa")
+    db.add_user(bot_id, 42)
+
+    db.ban_platform_users([42, 77], banned_by=1)
+    db.ban_platform_users([77], banned_by=1)  # Banning twice is harmless
+
+    # A fresh instance (as after a restart) still sees both bans
+    reopened = Database(str(tmp_path / "test.db"))
+    assert reopened.get_blacklisted_user_ids() == {42, 77}
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import utils_4d
+
+ALL_CODES = frozenset(utils_4d.PROVIDERS)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(utils_4d, '_results_cache', {})
+
+
+def fake_scraper(monkeypatch, scraped):
+    """Replace the Playwright scrape with one returning scraped(), counting calls"""
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        return scraped()
+
+    monkeypatch.setattr(utils_4d, 'scrape_with_playwright', scrape)
+    return calls
+
+
+def live_results():
+    results = utils_4d.get_fallback_results()
+    results['MAGNUM'] = [dict(results['MAGNUM'][0], first='1234')]
+    return results
+
+
+def test_fallback_only_scrape_is_not_cached(monkeypatch):
+    calls = fake_scraper(monkeypatch, utils_4d.get_fallback_results)
+
+    asyncio.run(utils_4d.fetch_all_4d_results())
+    asyncio.run(utils_4d.fetch_all_4d_results())
+
+    assert len(calls) == 2
+    assert utils_4d._results_cache == {}
+
+
+def test_cached_results_are_copied_per_caller(monkeypatch):
+    calls = fake_scraper(monkeypatch, live_results)
+
+    first = asyncio.run(utils_4d.fetch_all_4d_results())
+    first['MAGNUM'][0]['first'] = 'XXXX'
+    first.pop('TOTO')
+    second = asyncio.run(utils_4d.fetch_all_4d_results())
+
+    assert len(calls) == 1
+    assert second['MAGNUM'][0]['first'] == '1234'
+    assert 'TOTO' in second
+
+
+def test_fallback_results_are_fresh_lists():
+    results = utils_4d.get_fallback_results()
+    results['MAGNUM'].append({})
+    assert len(utils_4d.get_fallback_results()['MAGNUM']) == 1
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 10, 13, 12, 0)  # A Tuesday
+
+
+@pytest.mark.parametrize("scrape_date, live, expected", [
+    # Same day: only the daily Cambodian draws can still change
+    ('2026-10-13', ALL_CODES, {'GD', 'PERDANA', 'LUCKY'}),
+    # Monday scrape: Singapore Toto drew on Monday too
+    ('2026-10-12', ALL_CODES, {'GD', 'PERDANA', 'LUCKY', 'SGTOTO'}),
+    # Sunday scrape: Wed/Sat/Sun providers drew that evening, Singapore Toto on Monday
+    ('2026-10-11', ALL_CODES, ALL_CODES),
+    # A provider with only fallback data is always stale
+    ('2026-10-13', ALL_CODES - {'MAGNUM'}, {'GD', 'PERDANA', 'LUCKY', 'MAGNUM'}),
+    # A week or more ago: everything has drawn since
+    ('2026-10-01', ALL_CODES, ALL_CODES),
+])
+def test_stale_providers_follow_each_draw_schedule(monkeypatch, scrape_date, live, expected):
+    monkeypatch.setattr(utils_4d, 'datetime', FixedDatetime)
+    assert set(utils_4d._stale_providers(scrape_date, frozenset(live))) == expected
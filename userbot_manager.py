@@ -7,68 +7,157 @@ import asyncio
 import logging
 import re
 import json
+import time
+from functools import lru_cache
+from types import MappingProxyType
 from datetime import datetime, timedelta, timezone
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
 from telethon.tl.functions.channels import JoinChannelRequest
 from telethon.tl.functions.messages import ImportChatInviteRequest
-from telethon.errors import SessionPasswordNeededError
+from telethon.errors import (
+    SessionPasswordNeededError, FloodWaitError,
+    ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError,
+)
 
 logger = logging.getLogger(__name__)
 
-# URL pattern to detect links in messages
-URL_PATTERN = re.compile(r'https?://\S+|t\.me/\S+', re.IGNORECASE)
+# URL pattern to detect links in messages. re.ASCII keeps sre on its fast ASCII
+# path; the explicit class still ends a URL at Unicode whitespace (NBSP etc.)
+_URL_BODY = r'[^\s\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+'
+URL_PATTERN = re.compile(rf'https?://{_URL_BODY}|t\.me/{_URL_BODY}', re.IGNORECASE | re.ASCII)
 
+# Company name normalisation (emoji strip, word split, alphanumeric-only)
+_EMOJI_STRIP_RE = re.compile(r'[^\w\s\-]', re.UNICODE)
+_WORD_SPLIT_RE = re.compile(r'[\s\-_.,]+')
+_ALNUM_STRIP_RE = re.compile(r'[^a-z0-9]')
 
-def match_company_in_text(company_name, text, keywords=''):
-    """Smart company name matching with multiple strategies.
-    
-    Handles variations like:
-    - DB: "🚀CM8 Platform" → matches "CM8" in text
-    - DB: "🎮BossBet8" → matches "bossbet8" in text
-    - Keywords: "a9, a-9" → matches "a9" in text
-    
-    Returns True if company matches, False otherwise.
+# Bots cannot upload files over 50 MB, so larger media is never downloaded
+MAX_MEDIA_BYTES = 50 * 1024 * 1024
+
+
+@lru_cache(maxsize=4096)
+def _build_company_matcher(company_name, keywords=''):
+    """Precompute everything match_company_in_text needs from one company.
+
+    Returns (literal_re, name_stripped): literal_re is one compiled alternation of
+    the keywords, the cleaned name and its significant words (None if there are
+    none); name_stripped is the alphanumeric-only name ('' if shorter than 3).
     """
-    text_lower = text.lower()
+    literals = set()
 
-    # 0) Check keywords/aliases first (most reliable)
+    # 0) Keywords/aliases (most reliable)
     if keywords:
         for kw in keywords.split(','):
             kw = kw.strip().lower()
-            if kw and len(kw) >= 2 and kw in text_lower:
-                return True
+            if kw and len(kw) >= 2:
+                literals.add(kw)
 
     # Strip emoji and special unicode chars from company name
-    cleaned_name = re.sub(r'[^\w\s\-]', '', company_name, flags=re.UNICODE)
-    cleaned_name = ''.join(c for c in cleaned_name if ord(c) < 0x10000 or c.isalnum())
+    cleaned_name = _EMOJI_STRIP_RE.sub('', company_name)
+    if not cleaned_name.isascii():
+        cleaned_name = ''.join(c for c in cleaned_name if ord(c) < 0x10000 or c.isalnum())
     cleaned_name = cleaned_name.strip()
     
     name_lower = cleaned_name.lower()
+    name_stripped = ''
 
-    if not name_lower:
-        return False
+    if name_lower:
+        # 1) Exact substring match
+        literals.add(name_lower)
 
-    # 1) Exact substring match
-    if name_lower in text_lower:
-        return True
+        # 2) Individual word match — any word (≥3 chars) from company name in text
+        words = _WORD_SPLIT_RE.split(name_lower)
+        literals.update(w for w in words if len(w) >= 3)
+
+        # 3) Stripped match — remove spaces/special chars and compare
+        name_stripped = _ALNUM_STRIP_RE.sub('', name_lower)
+        if len(name_stripped) < 3:
+            name_stripped = ''
+
+    # Substring semantics: the alternation matches iff any literal occurs in the text
+    literal_re = re.compile('|'.join(map(re.escape, literals))) if literals else None
+    return literal_re, name_stripped
 
-    # 2) Individual word match — any word (≥3 chars) from company name in text
-    words = re.split(r'[\s\-_.,]+', name_lower)
-    significant_words = [w for w in words if len(w) >= 3]
-    for word in significant_words:
-        if word in text_lower:
-            return True
 
-    # 3) Stripped match — remove spaces/special chars and compare
-    name_stripped = re.sub(r'[^a-z0-9]', '', name_lower)
-    text_stripped = re.sub(r'[^a-z0-9]', '', text_lower)
-    if len(name_stripped) >= 3 and name_stripped in text_stripped:
+def match_company_in_text(company_name, text_lower, text_stripped, keywords=''):
+    """Smart company name matching with multiple strategies.
+    
+    Handles variations like:
+    - DB: "🚀CM8 Platform" → matches "CM8" in text
+    - DB: "🎮BossBet8" → matches "bossbet8" in text
+    - Keywords: "a9, a-9" → matches "a9" in text
+    
+    text_lower is text.lower() and text_stripped is text_lower with everything but
+    a-z/0-9 removed — compute both once per message, not once per company.
+    
+    Returns True if company matches, False otherwise.
+    """
+    literal_re, name_stripped = _build_company_matcher(company_name, keywords or '')
+
+    if literal_re is not None and literal_re.search(text_lower):
         return True
 
+    if name_stripped:
+        return name_stripped in text_stripped
+
     return False
 
 
+def freeze_companies(companies):
+    """Read-only snapshot of a company list, safe to share between concurrent scans"""
+    return tuple(MappingProxyType(dict(c)) for c in companies)
+
+
+def build_company_index(companies, with_keywords=True):
+    """Compile a whole company list into one single-pass matcher for find_company_in_text.
+
+    Returns (scan_re, stripped): scan_re is a lookahead alternation with one group
+    per company, so at every text position it reports the lowest-index company
+    whose literal starts there; stripped is ((idx, name_stripped), ...) for the
+    alphanumeric-only fallback, in list order.
+    """
+    groups = []
+    stripped = []
+    for idx, company in enumerate(companies):
+        keywords = (company.get('keywords') or '') if with_keywords else ''
+        literal_re, name_stripped = _build_company_matcher(company['name'], keywords)
+        groups.append(f"({literal_re.pattern})" if literal_re is not None else "((?!))")
+        if name_stripped:
+            stripped.append((idx, name_stripped))
+    scan_re = re.compile('(?=' + '|'.join(groups) + ')') if groups else None
+    return scan_re, tuple(stripped)
+
+
+def find_company_in_text(companies, index, text):
+    """First company (in list order) that match_company_in_text would accept, or None.
+
+    Scans the text once for all companies instead of once per company.
+    """
+    scan_re, stripped = index
+    best = len(companies)
+    text_lower = text.lower()
+
+    if scan_re is not None:
+        for m in scan_re.finditer(text_lower):
+            best = min(best, m.lastindex - 1)
+            if best == 0:
+                return companies[0]
+
+    # Only companies earlier in the list can still win via the stripped match
+    text_stripped = None
+    for idx, name_stripped in stripped:
+        if idx >= best:
+            break
+        if text_stripped is None:
+            text_stripped = _ALNUM_STRIP_RE.sub('', text_lower)
+        if name_stripped in text_stripped:
+            best = idx
+            break
+
+    return companies[best] if best < len(companies) else None
+
+
 class UserbotInstance:
     """Single userbot instance for one bot owner"""
     
@@ -84,6 +173,70 @@ class UserbotInstance:
         # Album (media group) buffer: {grouped_id: [messages]}
         self._album_buffer = {}
         self._album_timers = {}  # {grouped_id: asyncio.Task}
+        # Per-event DB lookups: {key: (monotonic_ts, data)}
+        self._cache = {}
+        self._chat_titles = {}  # {chat_id: (monotonic_ts, source_name)}
+    
+    def _cached(self, key, loader, ttl=30):
+        """Return loader() memoized under key for ttl seconds"""
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is None or now - entry[0] > ttl:
+            entry = (now, loader())
+            self._cache[key] = entry
+        return entry[1]
+    
+    def invalidate_cache(self, key=None):
+        """Drop one cached lookup (or all of them) so the next event reloads it"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+    
+    def _load_monitored_ids(self):
+        """Every event.chat_id that belongs to a monitored channel, as ints.
+        
+        The DB may hold the bare ID (XXXX), the marked channel ID (-100XXXX) or a
+        group/user ID, so each entry is expanded to all of those forms.
+        """
+        ids = set()
+        for ch in self.db.get_monitored_channels(self.bot_id):
+            mid = str(ch['channel_id'])
+            bare = mid.lstrip('-')
+            if not bare.isdigit():
+                continue  # Link/username not resolved yet
+            if bare.startswith('100'):
+                bare = bare[3:]
+            for form in (mid, bare):
+                if not form or str(int(form)) != form:
+                    continue
+                n = int(form)
+                ids.add(n)
+                if form[0] == '-':
+                    continue
+                # Chats whose own bare ID (sign and -100 dropped) equals this form
+                if not form.startswith('100'):
+                    ids.add(-n)
+                marked = int(f"100{form}")
+                ids.update((marked, -marked))
+        return frozenset(ids)
+    
+    def reload_filters(self):
+        """(Re)register the message handler so Telethon only delivers monitored chats"""
+        self.invalidate_cache('channels')
+        chat_ids = self._cached('channels', self._load_monitored_ids)
+        if not self.client:
+            return
+        self.client.remove_event_handler(self._on_new_message)
+        self.client.add_event_handler(
+            self._on_new_message,
+            events.NewMessage(chats=list(chat_ids))
+        )
+    
+    def _load_company_index(self):
+        """Companies plus their compiled matcher (names only, as the live path never used keywords)"""
+        companies = self.db.get_companies(self.bot_id)
+        return companies, build_company_index(companies, with_keywords=False)
     
     async def start(self):
         """Start the Telethon client and begin monitoring (with retry)"""
@@ -101,11 +254,8 @@ class UserbotInstance:
                     logger.warning(f"[UB-{self.bot_id}] Session not authorized")
                     return False
                 
-                # Register event handler
-                self.client.add_event_handler(
-                    self._on_new_message,
-                    events.NewMessage()
-                )
+                # Register event handler (only for monitored chats)
+                self.reload_filters()
                 
                 self.running = True
                 logger.info(f"[UB-{self.bot_id}] Userbot started, monitoring channels")
@@ -135,35 +285,12 @@ class UserbotInstance:
                 return
             
             # Get monitored channels
-            channels = self.db.get_monitored_channels(self.bot_id)
-            if not channels:
+            monitored_ids = self._cached('channels', self._load_monitored_ids)
+            if not monitored_ids:
                 return
             
-            # Normalize channel ID — Telethon returns -100XXXX for channels
-            # but DB may store as XXXX (bare ID from chat.id)
-            raw_chat_id = event.chat_id
-            chat_id = str(raw_chat_id)
-            # Strip -100 prefix for comparison
-            bare_chat_id = chat_id.lstrip('-')
-            if bare_chat_id.startswith('100'):
-                bare_chat_id = bare_chat_id[3:]
-            
-            monitored_ids = [str(ch['channel_id']) for ch in channels]
-            # Also build bare versions of monitored IDs
-            bare_monitored = []
-            for mid in monitored_ids:
-                bare = mid.lstrip('-')
-                if bare.startswith('100'):
-                    bare = bare[3:]
-                bare_monitored.append(bare)
-            
-            # Match on any format
-            matched = (chat_id in monitored_ids or 
-                       bare_chat_id in monitored_ids or
-                       chat_id in bare_monitored or
-                       bare_chat_id in bare_monitored)
-            
-            if not matched:
+            # Telethon returns -100XXXX for channels; monitored_ids holds every form
+            if event.chat_id not in monitored_ids:
                 return
             
             # Check if this is part of a media group (album)
@@ -217,49 +344,16 @@ class UserbotInstance:
             logger.info(f"[UB-{self.bot_id}] Album detected: {len(events_list)} media, caption: {caption[:60]}...")
             
             # Download ALL media from the album
-            all_media_bytes = []
-            all_media_types = []
+            # Up to 3 parts download at once; results keep album order
+            sem = asyncio.Semaphore(3)
             
-            for evt in events_list:
-                if evt.message.media:
-                    from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
-                    mt = None
-                    if isinstance(evt.message.media, MessageMediaPhoto):
-                        mt = 'photo'
-                    elif isinstance(evt.message.media, MessageMediaDocument):
-                        doc = evt.message.media.document
-                        mime = getattr(doc, 'mime_type', '') or ''
-                        mt = 'video' if mime.startswith('video/') else 'document'
-                    
-                    if mt:
-                        try:
-                            from io import BytesIO
-                            buffer = BytesIO()
-                            await self.client.download_media(evt.message, file=buffer)
-                            data = buffer.getvalue()
-                            if data:
-                                all_media_bytes.append(data)
-                                all_media_types.append(mt)
-                            else:
-                                logger.warning(f"[UB-{self.bot_id}] Album media download empty for msg {evt.message.id} (possibly restricted)")
-                        except Exception as e:
-                            err_str = str(e).lower()
-                            if 'protected' in err_str or 'forward' in err_str or 'restricted' in err_str or 'savecontent' in err_str:
-                                logger.warning(f"[UB-{self.bot_id}] Album media restricted, trying direct download: {e}")
-                                try:
-                                    import tempfile, os
-                                    tmp = tempfile.mkdtemp()
-                                    path = await self.client.download_media(evt.message, file=tmp)
-                                    if path and os.path.exists(path):
-                                        with open(path, 'rb') as f:
-                                            all_media_bytes.append(f.read())
-                                        all_media_types.append(mt)
-                                        os.remove(path)
-                                    os.rmdir(tmp)
-                                except Exception as e2:
-                                    logger.error(f"[UB-{self.bot_id}] Album restricted fallback also failed: {e2}")
-                            else:
-                                logger.error(f"[UB-{self.bot_id}] Album media download failed: {e}")
+            async def _download(message):
+                async with sem:
+                    return await self._download_media_bytes(message, 'Album media')
+            
+            downloads = await asyncio.gather(*(_download(evt.message) for evt in events_list))
+            all_media_bytes = [data for data, mt in downloads if data]
+            all_media_types = [mt for data, mt in downloads if data]
             
             # Process as single promo with multiple media
             await self._process_promo_data(
@@ -269,6 +363,61 @@ class UserbotInstance:
         except Exception as e:
             logger.error(f"[UB-{self.bot_id}] Album processing error: {e}")
 
+    async def _download_media_bytes(self, message, label):
+        """Download a message's photo/video/document into memory.
+        
+        Returns (data, media_type); data is None when there is no supported media,
+        it is larger than MAX_MEDIA_BYTES, or the download failed.
+        """
+        if not message.media:
+            return None, None
+        
+        from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
+        mt = None
+        if isinstance(message.media, MessageMediaPhoto):
+            mt = 'photo'
+        elif isinstance(message.media, MessageMediaDocument):
+            doc = message.media.document
+            mime = getattr(doc, 'mime_type', '') or ''
+            mt = 'video' if mime.startswith('video/') else 'document'
+        if not mt:
+            return None, None
+        
+        size = getattr(message.file, 'size', None) if message.file else None
+        if size and size > MAX_MEDIA_BYTES:
+            logger.warning(f"[UB-{self.bot_id}] {label} too large to forward ({size} bytes) for msg {message.id}, skipping")
+            return None, mt
+        
+        try:
+            from io import BytesIO
+            buffer = BytesIO()
+            await self.client.download_media(message, file=buffer)
+            data = buffer.getvalue()
+            if data:
+                return data, mt
+            logger.warning(f"[UB-{self.bot_id}] {label} download empty for msg {message.id} (possibly restricted)")
+        except Exception as e:
+            err_str = str(e).lower()
+            if 'protected' in err_str or 'forward' in err_str or 'restricted' in err_str or 'savecontent' in err_str:
+                logger.warning(f"[UB-{self.bot_id}] {label} restricted, trying direct download: {e}")
+                try:
+                    import tempfile, os
+                    tmp = tempfile.mkdtemp()
+                    path = await self.client.download_media(message, file=tmp)
+                    data = None
+                    if path and os.path.exists(path):
+                        with open(path, 'rb') as f:
+                            data = f.read()
+                        os.remove(path)
+                    os.rmdir(tmp)
+                    if data:
+                        return data, mt
+                except Exception as e2:
+                    logger.error(f"[UB-{self.bot_id}] {label} restricted fallback also failed: {e2}")
+            else:
+                logger.error(f"[UB-{self.bot_id}] {label} download failed: {e}")
+        return None, mt
+
     async def _process_single_message(self, event):
         """Process a single (non-album) message"""
         text = event.message.message or ""
@@ -279,45 +428,10 @@ class UserbotInstance:
         all_media_bytes = []
         all_media_types = []
         
-        if event.message.media:
-            from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
-            mt = None
-            if isinstance(event.message.media, MessageMediaPhoto):
-                mt = 'photo'
-            elif isinstance(event.message.media, MessageMediaDocument):
-                doc = event.message.media.document
-                mime = getattr(doc, 'mime_type', '') or ''
-                mt = 'video' if mime.startswith('video/') else 'document'
-            
-            if mt:
-                try:
-                    from io import BytesIO
-                    buffer = BytesIO()
-                    await self.client.download_media(event.message, file=buffer)
-                    data = buffer.getvalue()
-                    if data:
-                        all_media_bytes.append(data)
-                        all_media_types.append(mt)
-                    else:
-                        logger.warning(f"[UB-{self.bot_id}] Media download empty for msg {event.message.id} (possibly restricted)")
-                except Exception as e:
-                    err_str = str(e).lower()
-                    if 'protected' in err_str or 'forward' in err_str or 'restricted' in err_str or 'savecontent' in err_str:
-                        logger.warning(f"[UB-{self.bot_id}] Media restricted, trying direct download: {e}")
-                        try:
-                            import tempfile, os
-                            tmp = tempfile.mkdtemp()
-                            path = await self.client.download_media(event.message, file=tmp)
-                            if path and os.path.exists(path):
-                                with open(path, 'rb') as f:
-                                    all_media_bytes.append(f.read())
-                                all_media_types.append(mt)
-                                os.remove(path)
-                            os.rmdir(tmp)
-                        except Exception as e2:
-                            logger.error(f"[UB-{self.bot_id}] Restricted fallback also failed: {e2}")
-                    else:
-                        logger.error(f"[UB-{self.bot_id}] Media download failed: {e}")
+        data, mt = await self._download_media_bytes(event.message, 'Media')
+        if data:
+            all_media_bytes.append(data)
+            all_media_types.append(mt)
         
         await self._process_promo_data(event, text, all_media_bytes, all_media_types)
 
@@ -363,13 +477,8 @@ class UserbotInstance:
                     raw_entities.append(ent_data)
             
             # Try to match a company (optional — no longer required)
-            companies = self.db.get_companies(self.bot_id)
-            matched_company = None
-            
-            for company in companies:
-                if match_company_in_text(company['name'], text):
-                    matched_company = company
-                    break
+            companies, company_index = self._cached('companies', self._load_company_index)
+            matched_company = find_company_in_text(companies, company_index, text) if companies else None
             
             if matched_company:
                 logger.info(f"[UB-{self.bot_id}] Auto-matched company: {matched_company['name']}")
@@ -383,16 +492,13 @@ class UserbotInstance:
                 if target_url.startswith('t.me/'):
                     target_url = 'https://' + target_url
                 
-                urls_found = URL_PATTERN.findall(text)
-                if urls_found:
-                    for url in urls_found:
-                        swapped_text = swapped_text.replace(url, target_url)
-                else:
+                # Callable replacement so backslashes in the URL are not treated as escapes
+                swapped_text, n = URL_PATTERN.subn(lambda m: target_url, text)
+                if n == 0:
                     swapped_text += f"\n\n🔗 {target_url}"
             
             # Get channel info
-            chat = await event.get_chat()
-            source_name = getattr(chat, 'title', None) or getattr(chat, 'username', None) or str(event.chat_id)
+            source_name = await self._source_name(event)
             
             # Use first media as primary (for notification)
             media_bytes = all_media_bytes[0] if all_media_bytes else None
@@ -401,7 +507,7 @@ class UserbotInstance:
             media_types = all_media_types
             
             # Save to DB
-            session_data = self.db.get_userbot_session(self.bot_id)
+            session_data = self._cached('session', lambda: self.db.get_userbot_session(self.bot_id))
             auto_mode = session_data.get('auto_mode', 0) if session_data else 0
             
             company_name = matched_company['name'] if matched_company else ''
@@ -426,8 +532,9 @@ class UserbotInstance:
                 'entities': raw_entities,  # Telethon entities for premium emoji support
             }
             
-            # Save promo record
-            promo_id = self.db.save_detected_promo(
+            # Save promo record (off the event loop; the notification needs its id)
+            promo_id = await asyncio.to_thread(
+                self.db.save_detected_promo,
                 bot_id=self.bot_id,
                 source_channel=source_name,
                 original_text=text,
@@ -448,6 +555,17 @@ class UserbotInstance:
         except Exception as e:
             logger.error(f"[UB-{self.bot_id}] Error processing promo: {e}")
     
+    async def _source_name(self, event, ttl=3600):
+        """Chat title (or username) for an event, cached per chat so promos skip the get_chat RPC"""
+        now = time.monotonic()
+        entry = self._chat_titles.get(event.chat_id)
+        if entry and now - entry[0] < ttl:
+            return entry[1]
+        chat = await event.get_chat()
+        name = getattr(chat, 'title', None) or getattr(chat, 'username', None) or str(event.chat_id)
+        self._chat_titles[event.chat_id] = (now, name)
+        return name
+    
     async def _safe_notify(self, promo_data):
         """Wrapper to safely call notify_callback without crashing"""
         try:
@@ -499,8 +617,9 @@ class UserbotInstance:
             logger.error(f"[UB-{self.bot_id}] Failed to join channel: {e}")
             return None
 
-    async def scan_channel_history(self, channel_id, days=30):
+    async def scan_channel_history(self, channel_id, days=30, companies=None):
         """Scan last N days of messages in a channel.
+        companies: preloaded freeze_companies() snapshot (keywords already generated); loaded here if None.
         Returns list of scraped items (text, media, etc).
         """
         if not self.client:
@@ -510,12 +629,20 @@ class UserbotInstance:
 
         # Resolve entity — try multiple approaches
         entity = None
+        stored = next((ch for ch in self.db.get_monitored_channels(self.bot_id)
+                       if str(ch.get('channel_id')) == str(channel_id)), None)
+
+        # 0) Reuse the access hash saved by an earlier scan (no RPC needed)
+        if stored and stored.get('access_hash') and str(channel_id).isdigit():
+            from telethon.tl.types import InputPeerChannel
+            entity = InputPeerChannel(channel_id=int(channel_id), access_hash=int(stored['access_hash']))
 
         # 1) Try numeric ID directly
-        try:
-            entity = await self.client.get_entity(int(channel_id))
-        except Exception:
-            pass
+        if not entity:
+            try:
+                entity = await self.client.get_entity(int(channel_id))
+            except Exception:
+                pass
 
         # 2) Try with -100 prefix (Telethon channel format)
         if not entity:
@@ -527,12 +654,7 @@ class UserbotInstance:
 
         # 3) Try stored username from DB
         if not entity:
-            ch_data = self.db.get_monitored_channels(self.bot_id)
-            stored_username = None
-            for ch in ch_data:
-                if str(ch.get('channel_id')) == str(channel_id):
-                    stored_username = ch.get('channel_username')
-                    break
+            stored_username = stored.get('channel_username') if stored else None
             if stored_username:
                 try:
                     entity = await self.client.get_entity(stored_username)
@@ -565,86 +687,133 @@ class UserbotInstance:
             return 0
 
         # Update DB with real channel ID if needed
-        real_id = str(entity.id)
+        entity_id = getattr(entity, 'id', None) or entity.channel_id
+        real_id = str(entity_id)
         if real_id != str(channel_id):
             try:
                 self.db.update_monitored_channel_id(self.bot_id, channel_id, real_id,
                                                      getattr(entity, 'title', None),
                                                      getattr(entity, 'username', None))
+                self.reload_filters()
                 logger.info(f"[UB-{self.bot_id}] Updated channel_id {channel_id} -> {real_id}")
             except Exception as e:
                 logger.warning(f"[UB-{self.bot_id}] Failed to update channel_id: {e}")
 
+        # Remember the channel's access hash so the next scan can skip resolution
+        from telethon.tl.types import Channel
+        if isinstance(entity, Channel) and entity.access_hash and not (stored and stored.get('access_hash')):
+            try:
+                self.db.set_monitored_channel_access_hash(self.bot_id, real_id, entity.access_hash)
+            except Exception as e:
+                logger.warning(f"[UB-{self.bot_id}] Failed to save access hash: {e}")
+
         try:
             msg_count = 0
             scraped = []
-            resolved_channel_id = entity.id  # Store real channel ID for forwarding later
+            resolved_channel_id = entity_id  # Store real channel ID for forwarding later
             
             # Get companies for auto-matching
-            companies = self.db.get_companies(self.bot_id)
-
-            # Auto-generate keywords for companies that don't have any yet
-            for company in companies:
-                if not company.get('keywords'):
-                    try:
-                        from ai_rewriter import generate_keywords
-                        kw = await generate_keywords(company['name'])
-                        self.db.edit_company(company['id'], 'keywords', kw)
-                        company['keywords'] = kw  # Update in-memory too
-                        logger.info(f"[UB-{self.bot_id}] Auto-generated keywords for {company['name']}: {kw}")
-                    except Exception as e:
-                        logger.warning(f"[UB-{self.bot_id}] Failed to generate keywords: {e}")
-
-            async for msg in self.client.iter_messages(entity, limit=None):
-                # Stop when we reach messages older than our cutoff
-                if msg.date and msg.date.replace(tzinfo=timezone.utc) < since_date:
-                    break
-
-                msg_count += 1
-                text = msg.message or ""
-
-                # Skip messages with no text AND no media
-                has_links = bool(URL_PATTERN.findall(text)) if text else False
-                has_media = bool(msg.photo or msg.video)
-                if not text and not has_media:
-                    continue
-
-                # Auto-detect company
-                matched_company = None
-                if text and companies:
-                    for company in companies:
-                        kw = company.get('keywords', '') or ''
-                        if match_company_in_text(company['name'], text, keywords=kw):
-                            matched_company = company
-                            break
-
-                # Get source name (only once)
-                if not scraped:
-                    chat = await msg.get_chat()
-                    source_name = getattr(chat, 'title', None) or str(channel_id)
-                else:
-                    source_name = scraped[0]['source_channel']
+            if companies is None:
+                companies = self.db.get_companies(self.bot_id)
+                # Auto-generate keywords for companies that don't have any yet
+                await self._generate_missing_keywords(companies)
+                companies = freeze_companies(companies)
+
+            # Compile all companies into one matcher, reused for every message below
+            company_index = build_company_index(companies)
+
+            # Walk forward from the cutoff (oldest first) so Telegram only sends messages
+            # inside the window. Telethon sleeps through flood waits up to its default
+            # flood_sleep_threshold (60s); longer ones surface as FloodWaitError, so wait
+            # them out here and resume after the last message we saw
+            last_id = 0
+            while True:
+                # In reverse mode both offsets are exclusive lower bounds
+                window = {'offset_id': last_id} if last_id else {'offset_date': since_date}
+                try:
+                    async for msg in self.client.iter_messages(entity, limit=None, reverse=True, **window):
+                        msg_count += 1
+                        last_id = msg.id
+                        if msg_count % 100 == 0:
+                            await asyncio.sleep(0)  # Let other handlers run during long scans
+                        text = msg.message or ""
+
+                        # Skip messages with no text AND no media
+                        has_media = bool(msg.photo or msg.video)
+                        if not text and not has_media:
+                            continue
 
-                # Store msg reference for forwarding later (no download needed!)
-                scraped.append({
-                    'source_channel': source_name,
-                    'original_text': text,
-                    'channel_id': resolved_channel_id,  # For forwarding
-                    'msg_id': msg.id,
-                    'has_media': has_media,
-                    'msg_date': msg.date.strftime('%Y-%m-%d %H:%M') if msg.date else '',
-                    'matched_company': matched_company,
-                })
+                        # Auto-detect company
+                        matched_company = None
+                        if text and companies:
+                            matched_company = find_company_in_text(companies, company_index, text)
 
-                await asyncio.sleep(0.1)  # Rate limit (faster since no download)
+                        # Get source name (only once)
+                        if not scraped:
+                            chat = await msg.get_chat()
+                            source_name = getattr(chat, 'title', None) or str(channel_id)
+                        else:
+                            source_name = scraped[0]['source_channel']
+
+                        # Store msg reference for forwarding later (no download needed!)
+                        scraped.append({
+                            'source_channel': source_name,
+                            'original_text': text,
+                            'channel_id': resolved_channel_id,  # For forwarding
+                            'msg_id': msg.id,
+                            'has_media': has_media,
+                            'msg_date': msg.date.strftime('%Y-%m-%d %H:%M') if msg.date else '',
+                            'matched_company': matched_company,
+                        })
+                    break
+                except FloodWaitError as fw:
+                    logger.warning(f"[UB-{self.bot_id}] Flood wait {fw.seconds}s while scanning {channel_id}")
+                    await asyncio.sleep(fw.seconds + 1)
 
+        except (ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError, ValueError) as e:
+            logger.error(f"[UB-{self.bot_id}] Error scanning history for {channel_id}: {e}")
+            if stored and stored.get('access_hash'):
+                # Hash may be stale (e.g. session re-authorised as another account) — resolve next time
+                self.db.set_monitored_channel_access_hash(self.bot_id, real_id, None)
         except Exception as e:
+            # Flood waits, network and parse errors say nothing about the stored hash — keep it
             logger.error(f"[UB-{self.bot_id}] Error scanning history for {channel_id}: {e}")
 
+        scraped.reverse()  # Newest first, as before
         auto_matched = sum(1 for s in scraped if s.get('matched_company'))
         logger.info(f"[UB-{self.bot_id}] Scanned {msg_count} messages in {channel_id}, scraped {len(scraped)} items ({auto_matched} auto-matched)")
         return scraped
 
+    async def _generate_missing_keywords(self, companies):
+        """Generate keywords for companies without any (concurrently) and save them in one write"""
+        missing = [c for c in companies if not c.get('keywords')]
+        if not missing:
+            return
+        
+        from ai_rewriter import generate_keywords
+        sem = asyncio.Semaphore(8)  # Bound concurrent AI requests
+        
+        async def _generate(company):
+            async with sem:
+                return await generate_keywords(company['name'])
+        
+        results = await asyncio.gather(*(_generate(c) for c in missing), return_exceptions=True)
+        
+        updates = []
+        for company, kw in zip(missing, results):
+            if isinstance(kw, Exception):
+                logger.warning(f"[UB-{self.bot_id}] Failed to generate keywords: {kw}")
+                continue
+            company['keywords'] = kw  # Update in-memory too
+            updates.append((company['id'], kw))
+            logger.info(f"[UB-{self.bot_id}] Auto-generated keywords for {company['name']}: {kw}")
+        
+        if updates:
+            try:
+                await asyncio.to_thread(self.db.edit_companies_bulk, 'keywords', updates)
+            except Exception as e:
+                logger.warning(f"[UB-{self.bot_id}] Failed to save generated keywords: {e}")
+    
     async def forward_message(self, from_channel_id, msg_id, to_user_id):
         """Forward a message from a channel to a user via the userbot.
         
@@ -1236,6 +1405,18 @@ class UserbotManager:
             return None
         return await instance.join_channel(channel_link)
     
+    def invalidate_cache(self, bot_id, key=None):
+        """Make a running instance reload cached channels/companies/session on its next event"""
+        instance = self.instances.get(bot_id)
+        if instance:
+            instance.invalidate_cache(key)
+    
+    def reload_filters(self, bot_id):
+        """Re-apply the monitored channel list to a running instance's event filter"""
+        instance = self.instances.get(bot_id)
+        if instance:
+            instance.reload_filters()
+    
     def is_running(self, bot_id):
         """Check if userbot is running for a bot"""
         return bot_id in self.instances and self.instances[bot_id].running
@@ -1254,22 +1435,44 @@ class UserbotManager:
         if not channels:
             return []
 
-        all_scraped = []
-        for i, ch in enumerate(channels):
+        # Load companies and fill in missing keywords once for all channels
+        companies = self.db.get_companies(bot_id)
+        await instance._generate_missing_keywords(companies)
+        companies = freeze_companies(companies)
+
+        # Scan a few channels at a time — one client, but keep Telegram flood limits in mind
+        sem = asyncio.Semaphore(4)
+        done = 0
+
+        async def _scan_one(ch):
+            nonlocal done
             channel_id = ch['channel_id']
             channel_name = ch.get('channel_title', channel_id)
 
-            try:
-                scraped = await instance.scan_channel_history(channel_id, days=days)
-                all_scraped.extend(scraped)
+            async with sem:
+                try:
+                    scraped = await instance.scan_channel_history(channel_id, days=days, companies=companies)
+                except Exception as e:
+                    logger.error(f"[UB-{bot_id}] Scan failed for {channel_name}: {e}")
+                    scraped = None
+
+            done += 1
+            if progress_callback:
+                # A failed progress edit must never cost this channel's results
+                try:
+                    if scraped is None:
+                        await progress_callback(done, len(channels), f"❌ {channel_name}", 0)
+                    else:
+                        await progress_callback(done, len(channels), channel_name, len(scraped))
+                except Exception as e:
+                    logger.debug(f"[UB-{bot_id}] Scan progress update failed: {e}")
+            return scraped or []
 
-                if progress_callback:
-                    await progress_callback(i + 1, len(channels), channel_name, len(scraped))
+        results = await asyncio.gather(*(_scan_one(ch) for ch in channels))
 
-            except Exception as e:
-                logger.error(f"[UB-{bot_id}] Scan failed for {channel_name}: {e}")
-                if progress_callback:
-                    await progress_callback(i + 1, len(channels), f"❌ {channel_name}", 0)
+        all_scraped = []
+        for scraped in results:
+            all_scraped.extend(scraped)
 
         logger.info(f"[UB-{bot_id}] History scan complete: {len(all_scraped)} items from {len(channels)} channels")
         return all_scraped
@@ -5,30 +5,61 @@ Supports all 11 lottery providers across 4 regions
 """
 
 import asyncio
+import copy
 import logging
 import re
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# 4 consecutive digits (one 4D number)
+_FOUR_DIGIT = re.compile(r'\b(\d{4})\b')
+
+# Result panels on live4d2u.net
+_PANEL_SELECTOR = '.panel, .result-box, .lottery-result, [class*="result"]'
+
+# Panel text needles per provider, checked in order; the first match wins
+_PROVIDER_NEEDLES = (
+    (('magnum',), 'MAGNUM'),
+    (('damacai', 'da ma cai', '1+3d'), 'DAMACAI'),
+    (('sportstoto',), 'TOTO'),
+    (('cash sweep', 'cashsweep'), 'CASHSWEEP'),
+    (('sabah', 'diriwan'), 'SABAH88'),
+    (('stc', 'sandakan'), 'STC'),
+    (('singapore 4d', 'sg 4d'), 'SG4D'),
+    (('singapore toto', 'sg toto'), 'SGTOTO'),
+    (('grand dragon', 'gd lotto', 'gdlotto'), 'GD'),
+    (('perdana',), 'PERDANA'),
+    (('lucky hari', 'hari hari'), 'LUCKY'),
+)
+
+# Requests the scraper never needs; stylesheets stay, since innerText and tab clicks depend on layout
+_BLOCKED_RESOURCES = frozenset({'image', 'media', 'font'})
+
+# Draw weekdays (Monday = 0)
+_WED_SAT_SUN = (2, 5, 6)
+_MON_THU = (0, 3)
+_DAILY = (0, 1, 2, 3, 4, 5, 6)
+
 # All supported providers
 PROVIDERS = {
     # West Malaysia
-    'MAGNUM': {'name': 'Magnum 4D', 'region': 'West MY', 'tab': 'WEST MY'},
-    'DAMACAI': {'name': 'Da Ma Cai', 'region': 'West MY', 'tab': 'WEST MY'},
-    'TOTO': {'name': 'SportsToto', 'region': 'West MY', 'tab': 'WEST MY'},
+    'MAGNUM': {'name': 'Magnum 4D', 'region': 'West MY', 'tab': 'WEST MY', 'draw_days': _WED_SAT_SUN},
+    'DAMACAI': {'name': 'Da Ma Cai', 'region': 'West MY', 'tab': 'WEST MY', 'draw_days': _WED_SAT_SUN},
+    'TOTO': {'name': 'SportsToto', 'region': 'West MY', 'tab': 'WEST MY', 'draw_days': _WED_SAT_SUN},
     # East Malaysia
-    'CASHSWEEP': {'name': 'Cash Sweep', 'region': 'East MY', 'tab': 'EAST MY'},
-    'SABAH88': {'name': 'Sabah 88', 'region': 'East MY', 'tab': 'EAST MY'},
-    'STC': {'name': 'STC 4D', 'region': 'East MY', 'tab': 'EAST MY'},
+    'CASHSWEEP': {'name': 'Cash Sweep', 'region': 'East MY', 'tab': 'EAST MY', 'draw_days': _WED_SAT_SUN},
+    'SABAH88': {'name': 'Sabah 88', 'region': 'East MY', 'tab': 'EAST MY', 'draw_days': _WED_SAT_SUN},
+    'STC': {'name': 'STC 4D', 'region': 'East MY', 'tab': 'EAST MY', 'draw_days': _WED_SAT_SUN},
     # Singapore
-    'SG4D': {'name': 'Singapore 4D', 'region': 'Singapore', 'tab': 'SG'},
-    'SGTOTO': {'name': 'Singapore Toto', 'region': 'Singapore', 'tab': 'SG'},
+    'SG4D': {'name': 'Singapore 4D', 'region': 'Singapore', 'tab': 'SG', 'draw_days': _WED_SAT_SUN},
+    'SGTOTO': {'name': 'Singapore Toto', 'region': 'Singapore', 'tab': 'SG', 'draw_days': _MON_THU},
     # Cambodia
-    'GD': {'name': 'Grand Dragon', 'region': 'Cambodia', 'tab': 'Cambodia'},
-    'PERDANA': {'name': 'Perdana', 'region': 'Cambodia', 'tab': 'Cambodia'},
-    'LUCKY': {'name': 'Lucky Hari Hari', 'region': 'Cambodia', 'tab': 'Cambodia'},
+    'GD': {'name': 'Grand Dragon', 'region': 'Cambodia', 'tab': 'Cambodia', 'draw_days': _DAILY},
+    'PERDANA': {'name': 'Perdana', 'region': 'Cambodia', 'tab': 'Cambodia', 'draw_days': _DAILY},
+    'LUCKY': {'name': 'Lucky Hari Hari', 'region': 'Cambodia', 'tab': 'Cambodia', 'draw_days': _DAILY},
 }
 
 # Hardcoded latest results (fallback if scraping fails)
@@ -123,6 +154,72 @@ LATEST_RESULTS = {
     }
 }
 
+# LATEST_RESULTS in fetch_all_4d_results' shape, built once
+_FALLBACK_RESULTS = {code: [data] for code, data in LATEST_RESULTS.items()}
+
+
+# Warm Playwright browser, launched on first scrape and reused afterwards
+_playwright = None
+_browser = None
+_context = None
+
+
+async def _ensure_browser():
+    """Return the shared browser context, (re)launching Chromium if needed"""
+    global _playwright, _browser, _context
+    if _browser is not None and _browser.is_connected():
+        return _context
+    
+    from playwright.async_api import async_playwright
+    
+    await close_browser()
+    _playwright = await async_playwright().start()
+    _browser = await _playwright.chromium.launch(
+        headless=True,
+        args=['--no-sandbox', '--disable-setuid-sandbox']
+    )
+    _context = await _browser.new_context()
+    await _context.route('**/*', _block_heavy_resources)
+    logger.info("🌐 Playwright browser launched")
+    return _context
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def close_browser():
+    """Shut down the shared browser (called on platform shutdown)"""
+    global _playwright, _browser, _context
+    for closer in (_context, _browser):
+        if closer is not None:
+            try:
+                await closer.close()
+            except Exception:
+                pass
+    if _playwright is not None:
+        try:
+            await _playwright.stop()
+        except Exception:
+            pass
+    _playwright = _browser = _context = None
+
+
+async def _goto_with_retry(page, url: str, attempts: int = 3):
+    """page.goto with exponential backoff (0.5s, 1s, ...) between failed attempts"""
+    for attempt in range(attempts):
+        try:
+            return await page.goto(url, wait_until='domcontentloaded')
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = 0.5 * 2 ** attempt
+            logger.warning(f"Loading {url} failed ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
 
 async def scrape_with_playwright() -> Dict[str, List[dict]]:
     """
@@ -132,23 +229,22 @@ async def scrape_with_playwright() -> Dict[str, List[dict]]:
     results = {code: [] for code in PROVIDERS.keys()}
     
     try:
-        from playwright.async_api import async_playwright
-        
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            
-            page = await browser.new_page()
+        context = await _ensure_browser()
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        page = await context.new_page()
+        try:
             page.set_default_timeout(30000)
             
             # Navigate to main page
-            await page.goto('https://www.live4d2u.net/', wait_until='networkidle')
+            await _goto_with_retry(page, 'https://www.live4d2u.net/')
             logger.info("🌐 Loaded live4d2u.net")
             
-            # Wait for content to load
-            await page.wait_for_timeout(2000)
+            # Wait for the result panels rather than a fixed delay
+            try:
+                await page.wait_for_selector(_PANEL_SELECTOR, timeout=10000)
+            except PlaywrightTimeoutError:
+                # Still extract whatever panels did render; providers left empty get fallback data
+                logger.warning("Result panels slow to render, extracting what is present")
             
             # Scrape each region
             for tab_name in ['WEST MY', 'EAST MY', 'SG', 'Cambodia']:
@@ -166,8 +262,8 @@ async def scrape_with_playwright() -> Dict[str, List[dict]]:
                 except Exception as e:
                     logger.error(f"Error processing {tab_name} tab: {e}")
                     continue
-            
-            await browser.close()
+        finally:
+            await page.close()
             
     except ImportError:
         logger.error("Playwright not installed, using fallback data")
@@ -188,8 +284,7 @@ async def scrape_with_playwright() -> Dict[str, List[dict]]:
 async def extract_results_from_page(page, results: dict, tab_name: str):
     """Extract 4D results from the current page view"""
     
-    # Get all text content
-    content = await page.content()
+    today_str = datetime.now().strftime('%Y-%m-%d')
     
     # Map tab names to provider codes
     tab_providers = {
@@ -201,62 +296,46 @@ async def extract_results_from_page(page, results: dict, tab_name: str):
     
     providers = tab_providers.get(tab_name, [])
     
-    # Try to extract 4D numbers using regex patterns
-    # Pattern: 4 consecutive digits
-    four_digit_pattern = re.compile(r'\b(\d{4})\b')
-    all_numbers = four_digit_pattern.findall(content)
-    
     # Try to parse structured data from panels
     try:
-        panels = await page.query_selector_all('.panel, .result-box, .lottery-result, [class*="result"]')
+        # Read every panel's text in one browser round-trip
+        texts = await page.evaluate(
+            "sel => Array.from(document.querySelectorAll(sel), el => el.innerText)",
+            _PANEL_SELECTOR
+        )
         
-        for panel in panels:
-            text = await panel.inner_text()
+        for text in texts:
+            # Every provider on this tab already has a result
+            if all(results[code] for code in providers):
+                break
+            
             text_lower = text.lower()
             
             # Identify which provider this panel belongs to
-            provider_code = None
-            if 'magnum' in text_lower:
-                provider_code = 'MAGNUM'
-            elif 'damacai' in text_lower or 'da ma cai' in text_lower or '1+3d' in text_lower:
-                provider_code = 'DAMACAI'
-            elif 'toto' in text_lower and 'sportstoto' in text_lower:
-                provider_code = 'TOTO'
-            elif 'cash sweep' in text_lower or 'cashsweep' in text_lower:
-                provider_code = 'CASHSWEEP'
-            elif 'sabah' in text_lower or 'diriwan' in text_lower:
-                provider_code = 'SABAH88'
-            elif 'stc' in text_lower or 'sandakan' in text_lower:
-                provider_code = 'STC'
-            elif 'singapore 4d' in text_lower or 'sg 4d' in text_lower:
-                provider_code = 'SG4D'
-            elif 'singapore toto' in text_lower or 'sg toto' in text_lower:
-                provider_code = 'SGTOTO'
-            elif 'grand dragon' in text_lower or 'gd lotto' in text_lower or 'gdlotto' in text_lower:
-                provider_code = 'GD'
-            elif 'perdana' in text_lower:
-                provider_code = 'PERDANA'
-            elif 'lucky hari' in text_lower or 'hari hari' in text_lower:
-                provider_code = 'LUCKY'
+            provider_code = next(
+                (code for needles, code in _PROVIDER_NEEDLES
+                 if any(needle in text_lower for needle in needles)),
+                None
+            )
             
-            if provider_code and provider_code in providers:
+            # Skip other tabs' providers and ones already extracted
+            if provider_code in providers and not results[provider_code]:
                 # Extract numbers from this panel
-                numbers = four_digit_pattern.findall(text)
+                numbers = _FOUR_DIGIT.findall(text)
                 
                 if len(numbers) >= 3:
+                    # Slices past the end are empty, so short panels give '' specials/consolations
                     result = {
-                        'date': datetime.now().strftime('%Y-%m-%d'),
-                        'first': numbers[0] if len(numbers) > 0 else '',
-                        'second': numbers[1] if len(numbers) > 1 else '',
-                        'third': numbers[2] if len(numbers) > 2 else '',
-                        'special': ','.join(numbers[3:13]) if len(numbers) > 3 else '',
-                        'consolation': ','.join(numbers[13:23]) if len(numbers) > 13 else ''
+                        'date': today_str,
+                        'first': numbers[0],
+                        'second': numbers[1],
+                        'third': numbers[2],
+                        'special': ','.join(numbers[3:13]),
+                        'consolation': ','.join(numbers[13:23])
                     }
                     
-                    # Only add if not duplicate
-                    if not results[provider_code]:
-                        results[provider_code].append(result)
-                        logger.info(f"✅ Extracted {provider_code}: 1st={result['first']}")
+                    results[provider_code].append(result)
+                    logger.info(f"✅ Extracted {provider_code}: 1st={result['first']}")
                         
     except Exception as e:
         logger.error(f"Error extracting panel data: {e}")
@@ -264,31 +343,74 @@ async def extract_results_from_page(page, results: dict, tab_name: str):
 
 def get_fallback_results() -> Dict[str, List[dict]]:
     """Return hardcoded fallback results"""
-    results = {}
-    for code, data in LATEST_RESULTS.items():
-        results[code] = [data]
-    return results
+    # Fresh lists so callers may append without touching the shared table
+    return {code: list(draws) for code, draws in _FALLBACK_RESULTS.items()}
+
+
+# In-process cache of scrape results: {scrape_date: (timestamp, results, live provider codes)}
+RESULTS_CACHE_TTL = 600  # 10 minutes
+_results_cache = {}
+_fetch_lock = asyncio.Lock()
+
+
+def _stale_providers(scrape_date: str, live: frozenset) -> List[str]:
+    """Providers a scrape from scrape_date can't vouch for today.
+
+    A provider is stale if the scrape only had fallback data for it, or if one of
+    its draw days falls between scrape_date and today (both inclusive).
+    """
+    day = datetime.strptime(scrape_date, '%Y-%m-%d').date()
+    today = datetime.now().date()
+    weekdays = {(day + timedelta(days=n)).weekday() for n in range(min((today - day).days + 1, 7))}
+    return [
+        code for code, info in PROVIDERS.items()
+        if code not in live or weekdays.intersection(info['draw_days'])
+    ]
 
 
 async def fetch_all_4d_results() -> Dict[str, List[dict]]:
     """
     Main function to fetch 4D results
     Tries Playwright first, falls back to hardcoded data
+    Results are cached per day for RESULTS_CACHE_TTL; concurrent callers share one scrape
+    While no provider has drawn since, a complete scrape is reused as-is, since results cannot change
     """
-    logger.info("🎰 Starting 4D results fetch...")
+    today = datetime.now().strftime('%Y-%m-%d')
     
-    try:
-        results = await scrape_with_playwright()
+    async with _fetch_lock:
+        for scrape_date, (cached_at, cached, live) in _results_cache.items():
+            if not _stale_providers(scrape_date, live):
+                logger.info("🎰 No draw since last fetch, serving cached 4D results")
+                return copy.deepcopy(cached)
+            if scrape_date == today and time.time() - cached_at < RESULTS_CACHE_TTL:
+                logger.info("🎰 4D results cache hit")
+                return copy.deepcopy(cached)
         
-        # Count successful scrapes
-        success_count = sum(1 for code, draws in results.items() if draws)
-        logger.info(f"📊 Fetched results for {success_count}/{len(PROVIDERS)} providers")
+        logger.info("🎰 Starting 4D results fetch...")
         
-        return results
+        try:
+            results = await scrape_with_playwright()
+            
+            # Successful scrapes (not the hardcoded fill-ins)
+            live = frozenset(
+                code for code, draws in results.items()
+                if draws and draws[0] != LATEST_RESULTS.get(code)
+            )
+            success_count = len(live)
+            logger.info(f"📊 Fetched results for {success_count}/{len(PROVIDERS)} providers")
+            
+        except Exception as e:
+            logger.error(f"4D fetch failed: {e}")
+            return get_fallback_results()
         
-    except Exception as e:
-        logger.error(f"4D fetch failed: {e}")
-        return get_fallback_results()
+        # Nothing real came back: don't cache, so the next call retries the scrape
+        if not success_count:
+            return results
+        
+        _results_cache.clear()  # Only the latest scrape is ever useful
+        # Callers get their own copy; mutating it must not touch the cache
+        _results_cache[today] = (time.time(), copy.deepcopy(results), live)
+        return results
 
 
 def get_provider_info(code: str) -> Optional[dict]:
@@ -316,5 +438,6 @@ if __name__ == "__main__":
             if draws:
                 d = draws[0]
                 print(f"  Latest: 1st={d['first']}, 2nd={d['second']}, 3rd={d['third']}")
+        await close_browser()
     
     asyncio.run(test())